@@ -0,0 +1,92 @@
+import codecs
+import json
+import logging
+import re
+from json.decoder import scanstring
+
+import tracing
+
+# 每次读取的字节数
+CHUNK_SIZE = 64 * 1024
+# 读取字节上限，超过后视为找不到
+MAX_HEADER_BYTES = 8 * 1024 * 1024
+# 计算MD5需要的字段
+HEADER_KEYS = ('author', 'artist', 'song')
+
+_key_pattern = re.compile(r'"(author|artist|song)"\s*:\s*"')
+# 字符串的原文（到第一个未转义的引号），用于转义无效的值
+_raw_value = re.compile(r'((?:\\.|[^"\\])*)"', re.DOTALL)
+# 未匹配时保留的缓冲区尾部长度，防止键名被分块截断
+_KEEP_TAIL = 64
+
+
+def read_header(path, max_bytes=MAX_HEADER_BYTES, chunk_size=CHUNK_SIZE):
+    """
+    流式读取谱面文件，找到 author / artist / song 后立即停止
+    字符串按JSON规则反转义；返回 {键: 值}，未找到的键不在结果中
+    """
+    found = {}
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='ignore')
+    buffer = ''
+    pos = 0
+    read_bytes = 0
+    eof = False
+
+    with open(path, 'rb') as f:
+        while len(found) < len(HEADER_KEYS):
+            match = _key_pattern.search(buffer, pos)
+            if match is not None:
+                try:
+                    value, end = scanstring(buffer, match.end(), False)
+                except json.JSONDecodeError:
+                    raw = _raw_value.match(buffer, match.end())
+                    if raw is not None:
+                        # 字符串完整但转义无效（如 \q），与旧版正则一样按原文取值
+                        found.setdefault(match.group(1), raw.group(1).replace('\\n', '\n').replace('\\"', '"'))
+                        pos = raw.end()
+                        continue
+                    if eof:
+                        # 文件结束或已达上限，字符串仍不完整
+                        pos = match.end()
+                        continue
+                    # 字符串被分块截断，保留键名后继续读取
+                    buffer = buffer[match.start():]
+                    pos = 0
+                else:
+                    found.setdefault(match.group(1), value)
+                    pos = end
+                    continue
+            elif eof:
+                break
+            else:
+                buffer = buffer[max(pos, len(buffer) - _KEEP_TAIL):]
+                pos = 0
+
+            # 读取下一块
+            size = min(chunk_size, max_bytes - read_bytes)
+            chunk = f.read(size) if size > 0 else b''
+            read_bytes += len(chunk)
+            if chunk:
+                buffer += decoder.decode(chunk)
+            else:
+                buffer += decoder.decode(b'', final=True)
+                eof = True
+
+    return found
+
+
+def read_level_info(path):
+    """读取谱面的 (author, artist, song)，读取失败时返回 (None, None, None)"""
+    tracing.count('files_read')
+    try:
+        header = read_header(path)
+        if len(header) < len(HEADER_KEYS):
+            logging.error(f"Missing level settings in: {path}")
+            return None, None, None
+        return header['author'], header['artist'], header['song']
+    except FileNotFoundError:
+        logging.info(f"File not found: {path}")
+        return None, None, None
+    except Exception as e:
+        logging.error(e)
+        return None, None, None
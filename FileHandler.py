@@ -1,36 +1,30 @@
+import functools
 import json
 import logging
-import re
-import winreg
 import os
 
+import AdofaiParser
+import MD5Handler
+import tracing
+from PersistHandler import persist
+from catalog import SongCatalog
 
+
+@tracing.traced()
 def open_adofai(workshop_id: str):
-    url = get_adofai_path(workshop_id)
-    try:
-        with open(url, 'r', newline='\r', encoding='utf-8-sig', errors='ignore') as f:
-            text = f.read()
-            text = text.replace(r'\n', '\n')
-        author = re.search(r'"author":\s*"((?:\\"|.)*?)"', text, flags=re.DOTALL)
-        artist = re.search(r'"artist":\s*"((?:\\"|.)*?)"', text, flags=re.DOTALL)
-        song = re.search(r'"song":\s*"((?:\\"|.)*?)"', text, flags=re.DOTALL)
-        # print('author: ', author.group(1), 'artist: ', artist.group(1), 'song: ', song.group(1))
-        # print()
-        return author.group(1).replace('\\"', '"'), artist.group(1).replace('\\"', '"'), song.group(1).replace('\\"',
-                                                                                                               '"')
-    except FileNotFoundError:
-        logging.info(f"File not found: {url}")
-        return None, None, None
-    except Exception as e:
-        logging.error(e)
-        return None, None, None
+    return AdofaiParser.read_level_info(get_adofai_path(workshop_id))
 
 
 def get_adofai_path(workshop_id: str):
-    return os.path.join(base_url, workshop_id, 'main.adofai')
+    return os.path.join(get_base_url(), workshop_id, 'main.adofai')
 
 
 def get_steam_install_path():
+    try:
+        import winreg
+    except ImportError:
+        return None
+
     try:
         # 尝试访问 64 位系统的注册表路径
         key = winreg.OpenKey(
@@ -64,19 +58,24 @@ def get_steam_install_path():
 
 def load_md5_cache():
     """加载MD5缓存"""
+    entries = persist.get_pending(md5_cache_path)
+    if entries is not None:
+        return MD5Handler.MD5Cache(entries)
     try:
         with open(md5_cache_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            entries = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
         with open(md5_cache_path, 'w', encoding='utf-8') as f:
             json.dump({}, f)
-        return {}
+        entries = {}
+    persist.remember(md5_cache_path, entries)
+    return MD5Handler.MD5Cache(entries)
 
 
 def save_md5_cache(md5_cache):
     """保存MD5缓存"""
-    with open(md5_cache_path, 'w', encoding='utf-8') as f:
-        json.dump(md5_cache, f, ensure_ascii=False, indent=4)
+    persist.save(md5_cache_path, md5_cache.entries)
+    md5_cache.dirty = False
 
 
 def load_status_data():
@@ -84,53 +83,112 @@ def load_status_data():
     if os.path.exists(status_file_path):
         with open(status_file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            while len(data.get('data')) < 5:
-                data['data'].append(True)
-            return data
+        while len(data.get('data')) < 5:
+            data['data'].append(True)
+        persist.remember(status_file_path, data)
+        return data
     return {'data': [True, True, True, True, False]}
 
 
 def save_status_data(status_data):
     """保存按钮状态数据"""
-    with open(status_file_path, 'w', encoding='utf-8') as f:
-        json.dump(status_data, f, ensure_ascii=False, indent=4)
+    persist.save(status_file_path, status_data)
 
 
 def load_stars():
     """加载收藏歌曲ID列表"""
     try:
         with open(stars_file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            stars = json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
         return []
+    persist.remember(stars_file_path, stars)
+    return stars
 
 
 def save_stars(stars):
-    """保存收藏歌曲ID列表"""
-    with open(stars_file_path, 'w', encoding='utf-8') as f:
-        json.dump(stars, f, ensure_ascii=False, indent=4)
+    """保存收藏歌曲ID列表（按ID排序保证文件稳定）"""
+    persist.save(stars_file_path, sorted(stars))
 
 
 def load_song_data():
-    """加载歌曲基本信息"""
+    """加载歌曲基本信息，优先读取与JSON一致的二进制快照"""
+    try:
+        stat = os.stat(data_file_path)
+    except OSError:
+        return SongCatalog()
+    source_key = (stat.st_mtime_ns, stat.st_size)
+
+    catalog = SongCatalog.load_snapshot(snapshot_file_path, source_key)
+    if catalog is not None:
+        return catalog
+
     try:
         with open(data_file_path, 'r', encoding='utf-8') as f:
             raw_songs = json.load(f)
-            return [song for song in raw_songs if isinstance(song, dict)]
+            catalog = SongCatalog.from_songs(song for song in raw_songs if isinstance(song, dict))
     except (FileNotFoundError, json.JSONDecodeError):
-        return []
+        return SongCatalog()
+
+    try:
+        catalog.save_snapshot(snapshot_file_path, source_key)
+    except OSError as e:
+        logging.error(e)
+    return catalog
+
+
+def custom_data_stat():
+    """存档文件的 (修改时间, 大小)，文件不存在时返回None"""
+    try:
+        stat = os.stat(get_custom_data_path())
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
 
 def load_custom_data():
     """加载存档数据"""
-    with open(custom_data_path, 'r', encoding='utf-8-sig') as f:
+    with open(get_custom_data_path(), 'r', encoding='utf-8-sig') as f:
         return json.load(f)
 
 
-base_url = os.path.join(get_steam_install_path(), 'steamapps', 'workshop', 'content', '977950')
-game_url = os.path.join(get_steam_install_path(), 'steamapps', 'common', 'A Dance of Fire and Ice')
-custom_data_path = os.path.join(game_url, 'User', 'custom_data.sav')
+@functools.cache
+def get_steam_path():
+    """Steam安装路径，只查询一次注册表；设置了 ADOFAI_STEAM_PATH 时使用该目录（非Windows平台、基准测试）"""
+    path = os.environ.get('ADOFAI_STEAM_PATH') or get_steam_install_path()
+    if path is None:
+        raise FileNotFoundError('Steam install path not found')
+    return path
+
+
+def get_base_url():
+    """创意工坊谱面目录"""
+    return os.path.join(get_steam_path(), 'steamapps', 'workshop', 'content', '977950')
+
+
+def get_game_url():
+    """游戏目录"""
+    return os.path.join(get_steam_path(), 'steamapps', 'common', 'A Dance of Fire and Ice')
+
+
+def get_custom_data_path():
+    """存档文件路径"""
+    return os.path.join(get_game_url(), 'User', 'custom_data.sav')
+
+
+def __getattr__(name):
+    # base_url / game_url / custom_data_path 在第一次使用时才解析
+    if name == 'base_url':
+        return get_base_url()
+    if name == 'game_url':
+        return get_game_url()
+    if name == 'custom_data_path':
+        return get_custom_data_path()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 md5_cache_path = 'resource/workshop_md5_map.json'
 data_file_path = 'resource/levels_info.json'
+snapshot_file_path = 'resource/levels_info.snapshot'
 status_file_path = 'resource/status.json'
 stars_file_path = 'resource/starts.json'
@@ -1,4 +1,19 @@
 import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import AdofaiParser
+import tracing
+
+# 预热MD5缓存的并发数
+WARM_UP_WORKERS = 8
+# 是否使用进程池（谱面解析为CPU密集时更快）
+WARM_UP_USE_PROCESS = False
+# 谱面少于该数量或只有一个CPU时逐个计算，线程池的调度开销大于收益
+WARM_UP_MIN_PARALLEL = 256
+
 
 def generate_md5(author: str, artist: str, song: str) -> str:
     # 处理空值
@@ -9,3 +24,135 @@ def generate_md5(author: str, artist: str, song: str) -> str:
     # 拼接计算
     combined = f"{author}{artist}{song}"
     return hashlib.md5(combined.encode('utf-8')).hexdigest()
+
+
+def md5_of_level(path: str):
+    """读取谱面并计算MD5，读取失败返回None"""
+    author, artist, song = AdofaiParser.read_level_info(path)
+    if author is None and artist is None and song is None:
+        return None
+    return generate_md5(author, artist, song)
+
+
+def level_entry(path: str):
+    """读取谱面并生成缓存记录 {'md5', 'mtime', 'size'}，读取失败返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    md5 = md5_of_level(path)
+    if md5 is None:
+        return None
+    return {'md5': md5, 'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def warm_up(level_paths: dict, max_workers=WARM_UP_WORKERS, use_process=WARM_UP_USE_PROCESS) -> dict:
+    """
+    并发计算多个谱面的MD5
+    level_paths: {创意工坊ID: 谱面路径}，返回计算成功的 {创意工坊ID: 缓存记录}
+    """
+    if not level_paths:
+        return {}
+
+    start = time.perf_counter()
+    workshop_ids = list(level_paths)
+    paths = [level_paths[workshop_id] for workshop_id in workshop_ids]
+    if len(paths) < WARM_UP_MIN_PARALLEL or max_workers <= 1 or (os.cpu_count() or 1) <= 1:
+        entries = [level_entry(path) for path in paths]
+        max_workers = 1
+    else:
+        entries = _parallel(paths, max_workers, use_process)
+
+    elapsed = time.perf_counter() - start
+    logging.info(f"MD5 warm-up: {len(paths)} levels in {elapsed:.2f}s "
+                 f"({len(paths) / max(elapsed, 1e-9):.1f} levels/s, {max_workers} workers)")
+    return {workshop_id: entry for workshop_id, entry in zip(workshop_ids, entries) if entry is not None}
+
+
+def _parallel(paths, max_workers, use_process):
+    if use_process:
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        chunksize = max(1, len(paths) // (max_workers * 4))
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        chunksize = 1
+    with executor:
+        return list(executor.map(level_entry, paths, chunksize=chunksize))
+
+
+class MD5Cache:
+    """
+    创意工坊谱面MD5缓存
+    每条记录保存 main.adofai 的修改时间和大小，文件变化后重新计算
+    """
+
+    def __init__(self, entries=None):
+        self.entries = {}
+        for workshop_id, entry in (entries or {}).items():
+            if isinstance(entry, str):
+                # 旧格式只有MD5，下次使用时重新校验
+                entry = {'md5': entry, 'mtime': None, 'size': None}
+            self.entries[workshop_id] = entry
+        self.dirty = False
+
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    def resolve(self, level_paths: dict) -> dict:
+        """
+        获取谱面的MD5，未缓存或文件已变化的谱面并发重新计算
+        level_paths: {创意工坊ID: 谱面路径}，返回 {创意工坊ID: MD5}，文件不存在的谱面不在结果中
+        """
+        result = {}
+        pending = {}
+        hits = self.hits
+        for workshop_id, path in level_paths.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entry = self.entries.get(workshop_id)
+            if entry is None:
+                self.misses += 1
+                pending[workshop_id] = path
+            elif entry['mtime'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                self.revalidations += 1
+                pending[workshop_id] = path
+            else:
+                self.hits += 1
+                result[workshop_id] = entry['md5']
+
+        tracing.count('md5_cache_hits', self.hits - hits)
+        tracing.count('md5_cache_misses', len(pending))
+        with tracing.span('MD5Handler.warm_up', levels=len(pending)):
+            entries = warm_up(pending)
+        for workshop_id, entry in entries.items():
+            self.entries[workshop_id] = entry
+            result[workshop_id] = entry['md5']
+            self.dirty = True
+        return result
+
+    def prune(self, workshop_root: str) -> int:
+        """移除创意工坊中已不存在的谱面目录对应的记录，返回移除数量"""
+        if not os.path.isdir(workshop_root):
+            return 0
+        removed = [workshop_id for workshop_id in self.entries
+                   if not os.path.isdir(os.path.join(workshop_root, workshop_id))]
+        for workshop_id in removed:
+            del self.entries[workshop_id]
+        if removed:
+            self.evictions += len(removed)
+            self.dirty = True
+        return len(removed)
+
+    def stats(self) -> dict:
+        """缓存命中统计"""
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,96 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import threading
+
+# 合并写入的延迟（秒）
+FLUSH_DELAY = 0.5
+
+
+class PersistHandler:
+    """
+    延迟写入JSON文件
+    内容与磁盘上相同时不写入；短时间内的多次修改合并为一次，
+    在后台线程中先写临时文件再替换，程序退出时写完所有未保存的数据
+    """
+
+    def __init__(self, delay=FLUSH_DELAY):
+        self.delay = delay
+        # {路径: 待写入的数据}
+        self.pending = {}
+        # {路径: 磁盘上的数据}
+        self.saved = {}
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.timer = None
+        self.writes = 0
+
+    def remember(self, path, data):
+        """记录从磁盘读取的数据，之后保存相同内容时跳过"""
+        with self.lock:
+            self.saved[path] = copy.deepcopy(data)
+
+    def save(self, path, data):
+        """标记数据需要保存，返回是否有变化"""
+        with self.lock:
+            if path not in self.pending and self.saved.get(path) == data:
+                return False
+            self.pending[path] = copy.deepcopy(data)
+            self._schedule()
+        return True
+
+    def _schedule(self):
+        """需要持有 lock"""
+        if self.timer is None:
+            self.timer = threading.Timer(self.delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def get_pending(self, path):
+        """尚未写入磁盘的数据，没有时返回None"""
+        with self.lock:
+            data = self.pending.get(path)
+        return copy.deepcopy(data) if data is not None else None
+
+    def flush(self):
+        """立即写入所有待保存的数据"""
+        with self.flush_lock:
+            with self.lock:
+                pending = self.pending
+                self.pending = {}
+                if self.timer is not None:
+                    self.timer.cancel()
+                    self.timer = None
+
+            failed = {}
+            for path, data in pending.items():
+                try:
+                    write_json_atomic(path, data)
+                except OSError as e:
+                    logging.error(e)
+                    failed[path] = data
+                    continue
+                self.writes += 1
+                with self.lock:
+                    self.saved[path] = data
+
+            if failed:
+                # 写入失败的数据保留，下次定时或退出时重试；期间有新的修改时以新数据为准
+                with self.lock:
+                    for path, data in failed.items():
+                        self.pending.setdefault(path, data)
+                    self._schedule()
+
+
+def write_json_atomic(path, data):
+    """先写入临时文件再替换，避免写到一半的文件"""
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+    os.replace(temp_path, path)
+
+
+persist = PersistHandler()
+atexit.register(persist.flush)
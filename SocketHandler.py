@@ -1,38 +1,83 @@
 import socket
 
+# 连接和读取的默认超时（秒）
+CONNECT_TIMEOUT = 1.0
+READ_TIMEOUT = 3.0
+
 
 class SocketHandler:
-    def __init__(self, host='127.0.0.1', port=12345, mod_version='1.0.1'):
+    """
+    与模组的TCP连接
+    连接在第一次发送时建立并保持，断开后下次发送时自动重连；响应按行读取
+    """
+
+    def __init__(self, host='127.0.0.1', port=12345, mod_version='1.0.1',
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
         self.host = host
         self.port = port
         self.mod_version = mod_version
-        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.client_socket = None
+        self._buffer = b''
 
     def connect(self):
-        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.client_socket.connect((self.host, self.port))
+        self.close()
+        self.client_socket = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        self.client_socket.settimeout(self.read_timeout)
+        self.client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
     def close(self):
-        self.client_socket.close()
+        if self.client_socket is not None:
+            self.client_socket.close()
+            self.client_socket = None
+        self._buffer = b''
 
     def send_and_rec(self, data):
-        self.connect()
-        self.client_socket.sendall(data.encode())
-        massage = self.client_socket.recv(1024).decode().strip()
-        self.close()
-        return massage
+        """
+        发送一条命令并读取一行响应
+        复用的连接已被模组关闭时重连后重发一次；超时或新连接失败时抛出 OSError
+        """
+        while True:
+            fresh = self.client_socket is None
+            if fresh:
+                self.connect()
+            try:
+                self.client_socket.sendall(data.encode())
+                return self._read_line()
+            except (ConnectionError, EOFError) as e:
+                self.close()
+                if fresh:
+                    raise ConnectionError(e) from e
+            except OSError:
+                self.close()
+                raise
+
+    def _read_line(self):
+        while b'\n' not in self._buffer:
+            chunk = self.client_socket.recv(4096)
+            if not chunk:
+                if self._buffer:
+                    # 模组回复后直接关闭连接，没有换行
+                    line, self._buffer = self._buffer, b''
+                    self.close()
+                    return line.decode().strip()
+                raise EOFError('connection closed by mod')
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b'\n')
+        return line.decode().strip()
 
     def play(self, path):
         return self.send_and_rec(f'LOAD_LEVEL{path}\r\n')
 
     def get_version(self):
-        return self.send_and_rec(f'VERSION\r\n')
+        return self.send_and_rec('VERSION\r\n')
 
     def is_connected(self):
         try:
-            self.send_and_rec(f'CONNECT\r\n')
+            self.send_and_rec('CONNECT\r\n')
             return True
-        except ConnectionRefusedError:
+        except OSError:
             return False
 
     def is_new_version(self):
@@ -0,0 +1,70 @@
+"""
+比较流式谱面头解析与旧的整文件正则解析
+
+python benchmarks/bench_adofai_header.py
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import AdofaiParser
+from benchmarks.fixtures import make_adofai_text, write_adofai
+
+
+def regex_header(path):
+    """旧版 FileHandler.open_adofai 的解析方式"""
+    with open(path, 'r', newline='\r', encoding='utf-8-sig', errors='ignore') as f:
+        text = f.read()
+        text = text.replace(r'\n', '\n')
+    author = re.search(r'"author":\s*"((?:\\"|.)*?)"', text, flags=re.DOTALL)
+    artist = re.search(r'"artist":\s*"((?:\\"|.)*?)"', text, flags=re.DOTALL)
+    song = re.search(r'"song":\s*"((?:\\"|.)*?)"', text, flags=re.DOTALL)
+    return author.group(1).replace('\\"', '"'), artist.group(1).replace('\\"', '"'), song.group(1).replace('\\"', '"')
+
+
+def stream_header(path):
+    header = AdofaiParser.read_header(path)
+    return header['author'], header['artist'], header['song']
+
+
+def measure(func, path, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(path)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def check(tmp):
+    """转义无效的值与旧版正则结果一致，分块截断时也能读到"""
+    path = os.path.join(tmp, 'bad_escape.adofai')
+    text = make_adofai_text(tiles=3000, actions=10, author='AUTHOR').replace('AUTHOR', r'Bad \q escape')
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(text)
+    for chunk_size in (7, 64, AdofaiParser.CHUNK_SIZE):
+        header = AdofaiParser.read_header(path, chunk_size=chunk_size)
+        assert (header['author'], header['artist'], header['song']) == regex_header(path), header
+
+
+def main():
+    sizes = [(2000, 500), (20000, 5000), (100000, 40000)]
+    repeat = 5
+    print(f'{"tiles":>8} {"actions":>8} {"size(KB)":>10} {"regex(ms)":>10} {"stream(ms)":>11} {"speedup":>8}')
+    with tempfile.TemporaryDirectory() as tmp:
+        check(tmp)
+        for tiles, actions in sizes:
+            path = os.path.join(tmp, f'{tiles}.adofai')
+            write_adofai(path, tiles=tiles, actions=actions,
+                         author='Nickname "Nick"', artist='かめりあ', song='Hello (BPM)\n2023')
+            regex_time, regex_result = measure(regex_header, path, repeat)
+            stream_time, stream_result = measure(stream_header, path, repeat)
+            assert regex_result == stream_result, (regex_result, stream_result)
+            print(f'{tiles:>8} {actions:>8} {os.path.getsize(path) / 1024:>10.0f} '
+                  f'{regex_time * 1000:>10.2f} {stream_time * 1000:>11.2f} {regex_time / stream_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
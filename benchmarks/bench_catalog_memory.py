@@ -0,0 +1,70 @@
+"""
+比较歌曲数据的内存占用（tracemalloc）：旧的每首歌两个字典 / 紧凑目录+SongRow
+
+python benchmarks/bench_catalog_memory.py
+"""
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_songs
+from catalog import SongCatalog, SongRow
+
+
+def legacy(text):
+    """旧版：保留 levels_info.json 的字典，并为每首歌再生成一个行字典"""
+    songs = [song for song in json.loads(text) if isinstance(song, dict)]
+    rows = []
+    for song in songs:
+        rows.append({
+            'id': song['id'],
+            'workshop_id': song['workshopUrl'].split('&')[0].split('=')[-1],
+            'workshop_url': song['workshopUrl'].strip(),
+            'name': song['music']['name'],
+            'widget': None,
+            'artists': ', '.join(song['music']['artists']),
+            'difficulty': song.get('difficulty', 0),
+            'status': (0, 0),
+            'status_label': None,
+            'rks': 0,
+            'stars_button': None,
+            'is_star': False,
+        })
+    return songs, rows
+
+
+def compact(text):
+    catalog = SongCatalog.from_songs(song for song in json.loads(text) if isinstance(song, dict))
+    rows = [SongRow(catalog, index) for index in range(len(catalog))]
+    return catalog, rows
+
+
+def retained(func, text):
+    """func 返回值在函数结束后仍占用的内存（字节）"""
+    gc.collect()
+    tracemalloc.start()
+    result = func(text)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    print(f'{"songs":>8} {"dicts(MB)":>10} {"compact(MB)":>12} {"ratio":>6} {"dicts peak":>11} {"compact peak":>13}')
+    for count in (1000, 100000):
+        text = json.dumps(make_songs(count))
+        legacy_current, legacy_peak = retained(legacy, text)
+        compact_current, compact_peak = retained(compact, text)
+        mb = 1024 * 1024
+        print(f'{count:>8} {legacy_current / mb:>10.2f} {compact_current / mb:>12.2f} '
+              f'{legacy_current / compact_current:>5.1f}x {legacy_peak / mb:>11.2f} {compact_peak / mb:>13.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+冷启动加载歌曲目录：json.load + 构建目录 与 读取二进制快照
+
+python benchmarks/bench_catalog_snapshot.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_songs
+from catalog import SongCatalog
+
+REPEAT = 5
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return SongCatalog.from_songs(song for song in json.load(f) if isinstance(song, dict))
+
+
+def best_of(func, *args):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print(f'{"songs":>8} {"json(KB)":>9} {"snapshot(KB)":>13} {"json(ms)":>9} {"snapshot(ms)":>13} {"speedup":>8}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (1000, 10000, 100000):
+            json_path = os.path.join(tmp, f'levels_{count}.json')
+            snapshot_path = os.path.join(tmp, f'levels_{count}.snapshot')
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(make_songs(count), f, ensure_ascii=False, indent=4)
+            key = (1, os.path.getsize(json_path))
+
+            json_time, catalog = best_of(load_json, json_path)
+            catalog.save_snapshot(snapshot_path, key)
+            snapshot_time, loaded = best_of(SongCatalog.load_snapshot, snapshot_path, key)
+            assert loaded.strings == catalog.strings and loaded.columns() == catalog.columns()
+
+            print(f'{count:>8} {os.path.getsize(json_path) / 1024:>9.0f} {os.path.getsize(snapshot_path) / 1024:>13.0f} '
+                  f'{json_time * 1000:>9.2f} {snapshot_time * 1000:>13.2f} {json_time / snapshot_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""
+模组下载：断点续传、校验和解压的检查，以及流式下载与旧的整体读入内存的耗时和内存峰值
+
+python benchmarks/bench_download.py
+"""
+import hashlib
+import json
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downloader
+from benchmarks.fake_http import FakeHTTPServer
+
+SIZE = 32 * 1024 * 1024
+
+
+def make_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def check(directory):
+    rng = random.Random(0)
+    blob = rng.randbytes(1024 * 1024)
+    sha256 = hashlib.sha256(blob).hexdigest()
+    with FakeHTTPServer({'/mod.dll': blob}) as server:
+        # 传输中断后自动续传
+        path = os.path.join(directory, 'mod.dll')
+        server.cut_after['/mod.dll'] = 300000
+        progress = []
+        downloader.download(server.url('/mod.dll'), path, sha256, lambda done, total: progress.append(done))
+        assert open(path, 'rb').read() == blob
+        # 断开前已写入磁盘的部分不再重新下载
+        assert len(server.requests) == 2 and server.requests[-1][1].startswith('bytes=')
+        assert int(server.requests[-1][1][6:-1]) > 0
+        assert progress[-1] == len(blob)
+
+        # 已存在且校验一致时不再下载
+        count = len(server.requests)
+        downloader.download(server.url('/mod.dll'), path, sha256)
+        assert len(server.requests) == count
+
+        # 上次留下的 .part 在下次调用时续传
+        other = os.path.join(directory, 'other.dll')
+        with open(f'{other}.part', 'wb') as f:
+            f.write(blob[:500000])
+        downloader.download(server.url('/mod.dll'), other, sha256)
+        assert server.requests[-1] == ('/mod.dll', 'bytes=500000-')
+        assert open(other, 'rb').read() == blob
+
+        # 校验失败时删除 .part
+        bad = os.path.join(directory, 'bad.dll')
+        try:
+            downloader.download(server.url('/mod.dll'), bad, '0' * 64)
+            raise AssertionError('expected sha256 mismatch')
+        except downloader.DownloadError:
+            pass
+        assert not os.path.exists(bad) and not os.path.exists(f'{bad}.part')
+
+        # 没有摘要时不续传上次留下的、无法校验的 .part
+        unverified = os.path.join(directory, 'unverified.dll')
+        with open(f'{unverified}.part', 'wb') as f:
+            f.write(b'x' * 500000)
+        downloader.download(server.url('/mod.dll'), unverified)
+        assert server.requests[-1] == ('/mod.dll', None)
+        assert open(unverified, 'rb').read() == blob
+
+    # 从 GitHub 发布信息中读取摘要
+    release = {'assets': [{'name': 'SongsManageMod.dll', 'digest': f'sha256:{sha256}'},
+                          {'name': 'old.dll', 'digest': None}]}
+    with FakeHTTPServer({'/repos/o/r/releases/tags/v%201': json.dumps(release).encode()}) as server:
+        url = 'https://github.com/o/r/releases/download/v%201/'
+        assert downloader.published_sha256(url + 'SongsManageMod.dll', api_root=server.url('')) == sha256
+        assert downloader.published_sha256(url + 'old.dll', api_root=server.url('')) is None
+        assert downloader.published_sha256(url + 'missing.dll', api_root=server.url('')) is None
+        assert downloader.published_sha256(server.url('/mod.dll'), api_root=server.url('')) is None
+
+    # 服务器不支持续传时从头下载
+    with FakeHTTPServer({'/mod.dll': blob}, support_range=False) as server:
+        path = os.path.join(directory, 'norange.dll')
+        server.cut_after['/mod.dll'] = 300000
+        downloader.download(server.url('/mod.dll'), path, sha256)
+        assert open(path, 'rb').read() == blob
+
+    # 解压跳过未变化的文件
+    game_dir = os.path.join(directory, 'game')
+    archive = make_zip({'BepInEx/core/a.dll': b'a' * 1000, 'BepInEx/core/b.dll': b'b' * 1000, 'winhttp.dll': b'w'})
+    zip_path = os.path.join(directory, 'bepinex.zip')
+    with open(zip_path, 'wb') as f:
+        f.write(archive)
+    assert downloader.extract(zip_path, game_dir) == (3, 0)
+    with open(os.path.join(game_dir, 'winhttp.dll'), 'wb') as f:
+        f.write(b'changed')
+    assert downloader.extract(zip_path, game_dir) == (1, 2)
+    assert open(os.path.join(game_dir, 'winhttp.dll'), 'rb').read() == b'w'
+
+    unsafe_path = os.path.join(directory, 'unsafe.zip')
+    with open(unsafe_path, 'wb') as f:
+        f.write(make_zip({'../escape.txt': b'x'}))
+    try:
+        downloader.extract(unsafe_path, game_dir)
+        raise AssertionError('expected unsafe path error')
+    except downloader.DownloadError:
+        pass
+
+    # 安装：下载BepInEx压缩包并解压，再下载插件
+    artifacts = (
+        downloader.Artifact('BepInEx', None, os.path.join('BepInEx', 'core', 'a.dll'), hashlib.sha256(archive).hexdigest(),
+                            extract=True),
+        downloader.Artifact('Mod', None, os.path.join('BepInEx', 'plugins', 'Mod.dll'), sha256),
+    )
+    install_dir = os.path.join(directory, 'install')
+    os.makedirs(install_dir)
+    with FakeHTTPServer({'/bepinex.zip': archive, '/mod.dll': blob}) as server:
+        artifacts[0].url = server.url('/bepinex.zip')
+        artifacts[1].url = server.url('/mod.dll')
+        assert downloader.install(install_dir, artifacts) == ['BepInEx', 'Mod']
+        assert downloader.install(install_dir, artifacts) == []
+    assert os.path.isfile(os.path.join(install_dir, 'BepInEx', 'plugins', 'Mod.dll'))
+    assert sorted(os.listdir(install_dir)) == ['BepInEx', 'winhttp.dll']
+
+
+def legacy_download(url, path):
+    """旧版 download_mod 的方式：整个响应读入内存后写入"""
+    response = requests.get(url)
+    with open(path, 'wb') as f:
+        f.write(response.content)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        check(directory)
+
+        blob = random.Random(1).randbytes(SIZE)
+        print(f'{"":<10} {"time(ms)":>9} {"peak(MB)":>9}')
+        with FakeHTTPServer({'/bepinex.zip': blob}) as server:
+            for name, func in (('legacy', legacy_download), ('streamed', downloader.download)):
+                path = os.path.join(directory, f'{name}.zip')
+                elapsed, peak = measure(func, server.url('/bepinex.zip'), path)
+                assert os.path.getsize(path) == SIZE
+                print(f'{name:<10} {elapsed * 1000:>9.1f} {peak / 1024 / 1024:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+安装模组的总耗时：旧的逐个 requests.get、共用会话的顺序下载与并发下载（服务器注入延迟）
+
+python benchmarks/bench_installer.py
+"""
+import hashlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downloader
+from benchmarks.fake_http import FakeHTTPServer
+
+LATENCY = 0.2
+REPEAT = 3
+
+
+def make_files():
+    rng = random.Random(0)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('BepInEx/core/BepInEx.dll', rng.randbytes(512 * 1024))
+        zf.writestr('BepInEx/core/0Harmony.dll', rng.randbytes(512 * 1024))
+        zf.writestr('winhttp.dll', rng.randbytes(64 * 1024))
+    return {'/bepinex.zip': buffer.getvalue(), '/SongsManageMod.dll': rng.randbytes(256 * 1024)}
+
+
+def make_artifacts(server, files):
+    return (
+        downloader.Artifact('BepInEx', server.url('/bepinex.zip'), os.path.join('BepInEx', 'core', 'BepInEx.dll'),
+                            hashlib.sha256(files['/bepinex.zip']).hexdigest(), extract=True),
+        downloader.Artifact('SongsManageMod', server.url('/SongsManageMod.dll'),
+                            os.path.join('BepInEx', 'plugins', 'SongsManageMod.dll'),
+                            hashlib.sha256(files['/SongsManageMod.dll']).hexdigest()),
+    )
+
+
+def legacy_install(game_dir, artifacts):
+    """旧版 download_mod：逐个下载，每次新建连接"""
+    response = requests.get(artifacts[0].url)
+    with open(os.path.join(game_dir, 'temp.zip'), 'wb') as f:
+        f.write(response.content)
+    with zipfile.ZipFile(os.path.join(game_dir, 'temp.zip'), 'r') as zip_ref:
+        zip_ref.extractall(game_dir)
+    os.makedirs(os.path.join(game_dir, 'BepInEx', 'plugins'), exist_ok=True)
+    response = requests.get(artifacts[1].url)
+    with open(os.path.join(game_dir, artifacts[1].target), 'wb') as f:
+        f.write(response.content)
+
+
+def check(directory, files):
+    with FakeHTTPServer(dict(files)) as server:
+        artifacts = make_artifacts(server, files)
+
+        # 任一文件下载失败时游戏目录不变，再次安装时续传
+        game_dir = os.path.join(directory, 'failed')
+        os.makedirs(game_dir)
+        del server.files['/SongsManageMod.dll']
+        try:
+            downloader.install(game_dir, artifacts)
+            raise AssertionError('expected failure')
+        except downloader.DownloadError as e:
+            assert e.args[0] == 'SongsManageMod'
+        assert os.listdir(game_dir) == [downloader.STAGING_DIR]
+        assert downloader.missing(game_dir, artifacts) == list(artifacts)
+
+        server.files['/SongsManageMod.dll'] = files['/SongsManageMod.dll']
+        count = len(server.requests)
+        assert downloader.install(game_dir, artifacts) == ['BepInEx', 'SongsManageMod']
+        # 已下载并校验过的压缩包不再下载
+        assert [path for path, _ in server.requests[count:]] == ['/SongsManageMod.dll']
+        assert sorted(os.listdir(game_dir)) == ['BepInEx', 'winhttp.dll']
+        assert downloader.missing(game_dir, artifacts) == []
+
+        # 只缺少插件时只下载插件
+        os.remove(os.path.join(game_dir, artifacts[1].target))
+        assert downloader.install(game_dir, artifacts) == ['SongsManageMod']
+
+        # 移动到游戏目录时失败（如文件被游戏占用）：已移动的文件撤销，原有文件还原
+        game_dir = os.path.join(directory, 'locked')
+        os.makedirs(game_dir)
+        with open(os.path.join(game_dir, 'winhttp.dll'), 'wb') as f:
+            f.write(b'old')
+        replace = os.replace
+
+        def locked_replace(src, dst):
+            if dst == os.path.join(game_dir, artifacts[1].target):
+                raise PermissionError(13, 'file is locked', dst)
+            replace(src, dst)
+
+        os.replace = locked_replace
+        try:
+            downloader.install(game_dir, artifacts)
+            raise AssertionError('expected failure')
+        except downloader.DownloadError as e:
+            assert e.args[0] == 'SongsManageMod'
+        finally:
+            os.replace = replace
+        with open(os.path.join(game_dir, 'winhttp.dll'), 'rb') as f:
+            assert f.read() == b'old'
+        assert downloader.missing(game_dir, artifacts) == list(artifacts)
+        # 失败的安装中新建的目录也删除，游戏目录中只剩原有文件和用于续传的临时目录
+        assert sorted(os.listdir(game_dir)) == sorted([downloader.STAGING_DIR, 'winhttp.dll'])
+        assert downloader.install(game_dir, artifacts) == ['BepInEx', 'SongsManageMod']
+        assert downloader.missing(game_dir, artifacts) == []
+
+
+def timed(func):
+    best = float('inf')
+    for _ in range(REPEAT):
+        with tempfile.TemporaryDirectory() as game_dir:
+            start = time.perf_counter()
+            func(game_dir)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    files = make_files()
+    with tempfile.TemporaryDirectory() as directory:
+        check(directory, files)
+
+    print(f'latency {LATENCY * 1000:.0f} ms per request')
+    print(f'{"":<12} {"wall(ms)":>9}')
+    with FakeHTTPServer(files, latency=LATENCY) as server:
+        artifacts = make_artifacts(server, files)
+        runs = (
+            ('legacy', lambda game_dir: legacy_install(game_dir, artifacts)),
+            ('sequential', lambda game_dir: downloader.install(game_dir, artifacts, max_workers=1)),
+            ('concurrent', lambda game_dir: downloader.install(game_dir, artifacts)),
+        )
+        for name, func in runs:
+            print(f'{name:<12} {timed(func) * 1000:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+后台加载管线：各阶段完成的时间、调用线程被占用的时间，以及取消
+
+python benchmarks/bench_loader.py
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import loader
+from benchmarks.fixtures import make_songs, make_custom_data
+from catalog import SongCatalog, SongRow
+from registry import SongRegistry
+
+
+def make_pipeline(count, on_stage, md5_delay=0):
+    songs = make_songs(count)
+    catalog = SongCatalog.from_songs(songs)
+    md5_map = {catalog.workshop_id(index): hashlib.md5(catalog.workshop_id(index).encode()).hexdigest()
+               for index in range(len(catalog))}
+    custom_data = make_custom_data(md5_map)
+
+    def resolve_md5(catalog):
+        time.sleep(md5_delay)
+        return md5_map
+
+    pipeline = loader.LoadPipeline(lambda: SongCatalog.from_songs(songs), resolve_md5,
+                                   lambda: ((0, 0), custom_data), on_stage)
+    return pipeline, catalog, md5_map, custom_data
+
+
+def check():
+    results = {}
+    done = threading.Event()
+
+    def on_stage(stage, result):
+        results[stage] = result
+        if stage == loader.STATES:
+            done.set()
+
+    pipeline, catalog, md5_map, custom_data = make_pipeline(2000, on_stage)
+    pipeline.start()
+    assert done.wait(10)
+    assert list(results) == list(loader.STAGES)
+
+    # 结果与同步计算一致
+    registry = SongRegistry()
+    for index in range(len(catalog)):
+        registry.add(SongRow(catalog, index))
+    expected = registry.load_states(custom_data, md5_map)
+    loaded = SongRegistry()
+    for index in range(len(catalog)):
+        loaded.add(SongRow(catalog, index))
+    changed = loaded.apply_states(results[loader.STATES][1])
+    assert [row.id for row in changed] == [row.id for row in expected]
+    assert loaded.average_rks() == registry.average_rks()
+
+    # 取消后不再调用 on_stage
+    stages = []
+    pipeline, *_ = make_pipeline(2000, lambda stage, result: stages.append(stage), md5_delay=0.2)
+    future = pipeline.start()
+    time.sleep(0.05)
+    pipeline.cancel()
+    future.result()
+    assert stages == [loader.CATALOG], stages
+
+
+def main():
+    check()
+    print(f'{"songs":>8} {"start(ms)":>10} ' + ' '.join(f'{stage + "(ms)":>12}' for stage in loader.STAGES))
+    for count in (1000, 10000, 100000):
+        times = {}
+        done = threading.Event()
+
+        def on_stage(stage, result):
+            times[stage] = time.perf_counter()
+            if stage == loader.STATES:
+                done.set()
+
+        pipeline, *_ = make_pipeline(count, on_stage)
+        start = time.perf_counter()
+        pipeline.start()
+        returned = time.perf_counter()
+        done.wait()
+        print(f'{count:>8} {(returned - start) * 1000:>10.2f} '
+              + ' '.join(f'{(times[stage] - start) * 1000:>12.1f}' for stage in loader.STAGES))
+
+
+if __name__ == '__main__':
+    main()
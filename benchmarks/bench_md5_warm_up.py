@@ -0,0 +1,69 @@
+"""
+比较逐个计算、warm_up（按谱面数量和CPU数选择）与线程池 / 进程池并发预热MD5缓存的吞吐量
+
+python benchmarks/bench_md5_warm_up.py [谱面数量]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import MD5Handler
+from benchmarks.fixtures import write_adofai
+
+
+def make_workshop(root, count):
+    """生成 count 个创意工坊谱面目录，返回 {创意工坊ID: 谱面路径}"""
+    level_paths = {}
+    for i in range(count):
+        workshop_id = str(2000000000 + i)
+        os.makedirs(os.path.join(root, workshop_id))
+        path = os.path.join(root, workshop_id, 'main.adofai')
+        write_adofai(path, tiles=2000 + i % 7 * 3000, actions=500 + i % 5 * 800,
+                     author=f'author{i}', artist=f'artist{i}', song=f'song{i}', seed=i)
+        level_paths[workshop_id] = path
+    return level_paths
+
+
+def sequential(level_paths):
+    result = {}
+    for workshop_id, path in level_paths.items():
+        entry = MD5Handler.level_entry(path)
+        if entry is not None:
+            result[workshop_id] = entry
+    return result
+
+
+def parallel(level_paths, max_workers, use_process):
+    """不论谱面数量和CPU数都使用线程池 / 进程池"""
+    entries = MD5Handler._parallel(list(level_paths.values()), max_workers, use_process)
+    return {workshop_id: entry for workshop_id, entry in zip(level_paths, entries) if entry is not None}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1009
+    with tempfile.TemporaryDirectory() as tmp:
+        level_paths = make_workshop(tmp, count)
+        runs = [('sequential', lambda: sequential(level_paths)),
+                ('warm_up', lambda: MD5Handler.warm_up(level_paths))]
+        for workers in (4, 8, 16):
+            runs.append((f'threads x{workers}', lambda w=workers: parallel(level_paths, w, False)))
+        for workers in (4, os.cpu_count() or 4):
+            runs.append((f'processes x{workers}', lambda w=workers: parallel(level_paths, w, True)))
+
+        expected = None
+        print(f'{count} levels')
+        for name, run in runs:
+            start = time.perf_counter()
+            result = run()
+            elapsed = time.perf_counter() - start
+            if expected is None:
+                expected = result
+            assert result == expected
+            print(f'{name:>16}: {elapsed:6.2f}s  {count / elapsed:8.1f} levels/s')
+
+
+if __name__ == '__main__':
+    main()
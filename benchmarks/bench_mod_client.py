@@ -0,0 +1,134 @@
+"""
+异步模组客户端的吞吐量：逐条等待与流水线发送，并与同步 SocketHandler 比较
+模拟模组与客户端在同一个事件循环中逐条处理，本机往返几乎没有延迟，流水线在这里提升很小；
+异步客户端的目的是不阻塞界面线程，而不是提高本机吞吐量
+
+python benchmarks/bench_mod_client.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SocketHandler import SocketHandler
+from benchmarks.fake_mod import AsyncFakeMod, FakeModServer
+from mod_client import AsyncModClient, LoopThread
+
+REQUESTS = 20000
+SYNC_REQUESTS = 5000
+# 同时在途的请求数
+WINDOW = 256
+
+
+async def check():
+    async with AsyncFakeMod() as mod:
+        client = AsyncModClient(port=mod.port)
+        # 流水线请求的响应按顺序对应
+        results = await asyncio.gather(*(client.request('VERSION' if i % 2 else f'LOAD_LEVEL{i}')
+                                         for i in range(100)))
+        assert results == ['OK' if i % 2 == 0 else '1.0.1' for i in range(100)]
+        assert mod.connections == 1
+        await client.close()
+        # 关闭连接后下次请求自动重连
+        assert await client.is_new_version()
+        assert mod.connections == 2
+        await client.close()
+
+    # 超时的请求不会让后续响应错位
+    async with AsyncFakeMod(delay=0.05) as mod:
+        client = AsyncModClient(port=mod.port, read_timeout=0.02)
+        try:
+            await client.get_version()
+            raise AssertionError('expected timeout')
+        except TimeoutError:
+            pass
+        client.read_timeout = 1
+        assert await client.play('level') == 'OK'
+        await client.close()
+
+    # 模组不回复某条命令：该请求超时，连接断开，之后的请求在新连接上得到自己的响应
+    async with AsyncFakeMod(silent=1) as mod:
+        client = AsyncModClient(port=mod.port, read_timeout=0.1)
+        try:
+            await client.get_version()
+            raise AssertionError('expected timeout')
+        except TimeoutError:
+            pass
+        assert await client.play('x') == 'OK'
+        assert await client.get_version() == '1.0.1'
+        assert mod.connections == 2
+        await client.close()
+
+    # 模组一直不回复：每个请求都超时，但每次都重新连接，不会一直等在旧连接上
+    async with AsyncFakeMod(silent=10 ** 9) as mod:
+        client = AsyncModClient(port=mod.port, read_timeout=0.05)
+        for attempt in range(3):
+            try:
+                await client.get_version()
+                raise AssertionError('expected timeout')
+            except TimeoutError:
+                pass
+        assert mod.connections == 3
+        await client.close()
+
+    async with AsyncFakeMod() as mod:
+        port = mod.port
+    assert not await AsyncModClient(port=port).is_connected()
+
+
+async def sequential(client):
+    for _ in range(REQUESTS):
+        await client.get_version()
+
+
+async def pipelined(client):
+    semaphore = asyncio.Semaphore(WINDOW)
+
+    async def one():
+        async with semaphore:
+            return await client.get_version()
+
+    results = await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    assert results == ['1.0.1'] * REQUESTS
+
+
+async def run_async():
+    async with AsyncFakeMod() as mod:
+        client = AsyncModClient(port=mod.port)
+        for name, func in (('async sequential', sequential), ('async pipelined', pipelined)):
+            start = time.perf_counter()
+            await func(client)
+            elapsed = time.perf_counter() - start
+            print(f'{name:<18} {REQUESTS / elapsed:>10.0f}')
+        await client.close()
+
+
+def main():
+    asyncio.run(check())
+
+    # 后台线程中的事件循环：提交后立即返回
+    thread = LoopThread()
+    with FakeModServer() as server:
+        client = AsyncModClient(port=server.port)
+        start = time.perf_counter()
+        future = thread.submit(client.get_version())
+        submitted = time.perf_counter() - start
+        assert future.result(timeout=1) == '1.0.1'
+        print(f'submit returned in {submitted * 1e6:.0f} us')
+        thread.submit(client.close()).result()
+    thread.stop()
+
+    print(f'{"":<18} {"req/s":>10}')
+    with FakeModServer() as server:
+        handler = SocketHandler(port=server.port)
+        start = time.perf_counter()
+        for _ in range(SYNC_REQUESTS):
+            handler.get_version()
+        print(f'{"sync persistent":<18} {SYNC_REQUESTS / (time.perf_counter() - start):>10.0f}')
+    asyncio.run(run_async())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+单个谱面成绩变化后更新界面数据的耗时：重新读取整个存档与应用模组推送的进度事件
+
+python benchmarks/bench_progress_events.py
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_mod import AsyncFakeMod
+from benchmarks.fixtures import make_songs, make_custom_data
+from catalog import SongCatalog, SongRow
+from mod_client import ProgressSubscription
+from registry import SongRegistry
+
+EVENTS = 10000
+
+
+def make_registry(count):
+    catalog = SongCatalog.from_songs(make_songs(count))
+    registry = SongRegistry()
+    for index in range(len(catalog)):
+        registry.add(SongRow(catalog, index))
+    md5_map = {workshop_id: hashlib.md5(workshop_id.encode()).hexdigest() for workshop_id in registry.workshop_ids()}
+    return registry, md5_map
+
+
+async def check():
+    registry, md5_map = make_registry(1000)
+    registry.load_states({}, md5_map)
+    md5 = md5_map[registry.rows[0].workshop_id]
+    states = []
+    received = asyncio.Queue()
+
+    async with AsyncFakeMod() as mod:
+        subscription = ProgressSubscription(lambda *event: received.put_nowait(event), states.append,
+                                            port=mod.port, retry_interval=0.05)
+        task = asyncio.create_task(subscription.run())
+        while not states:
+            await asyncio.sleep(0.01)
+        assert states == [True]
+
+        await mod.push(md5, 1.0, 0.97)
+        event = await asyncio.wait_for(received.get(), 1)
+        assert event == (md5, 1.0, 0.97)
+        changed = registry.apply_progress(*event)
+        assert [row.id for row in changed] == [registry.rows[0].id]
+        assert changed[0].status == (2, 0.97)
+        assert registry.average_rks() == changed[0].rks / 20
+
+        # 推送中断后通知回退，并自动重新订阅
+        mod.drop_subscribers()
+        while len(states) < 3:
+            await asyncio.sleep(0.01)
+        assert states == [True, False, True]
+
+        subscription.stop()
+        await task
+
+
+async def throughput():
+    """模拟模组连续推送 EVENTS 个事件，直到全部收到的耗时"""
+    received = []
+    done = asyncio.Event()
+    subscribed = asyncio.Event()
+
+    def on_event(*event):
+        received.append(event)
+        if len(received) == EVENTS:
+            done.set()
+
+    async with AsyncFakeMod() as mod:
+        subscription = ProgressSubscription(on_event, lambda state: state and subscribed.set(), port=mod.port)
+        task = asyncio.create_task(subscription.run())
+        await subscribed.wait()
+        start = time.perf_counter()
+        for i in range(EVENTS):
+            await mod.push(f'{i:032x}', 1.0, 0.99)
+        await done.wait()
+        elapsed = time.perf_counter() - start
+        subscription.stop()
+        await task
+    return elapsed
+
+
+def main():
+    asyncio.run(check())
+    print(f'stream: {EVENTS / asyncio.run(throughput()):.0f} events/s')
+
+    rng = random.Random(0)
+    print(f'{"songs":>8} {"reload(ms)":>11} {"event(us)":>10}')
+    for count in (1000, 10000, 100000):
+        registry, md5_map = make_registry(count)
+        custom_data = make_custom_data(md5_map)
+        registry.load_states(custom_data, md5_map)
+        md5_list = list(md5_map.values())
+
+        md5 = rng.choice(md5_list)
+        custom_data[f'CustomWorld_{md5}_Completion'] = 1
+        custom_data[f'CustomWorld_{md5}_XAccuracy'] = 0.95
+        text = json.dumps(custom_data)
+        start = time.perf_counter()
+        registry.load_states(json.loads(text), md5_map)
+        reload = time.perf_counter() - start
+
+        events = [(rng.choice(md5_list), 1.0, rng.uniform(0.9, 1)) for _ in range(1000)]
+        start = time.perf_counter()
+        for event in events:
+            registry.apply_progress(*event)
+        event_time = (time.perf_counter() - start) / len(events)
+        print(f'{count:>8} {reload * 1000:>11.1f} {event_time * 1e6:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+状态和总RKS的计算耗时：旧的逐首计算 + 完整排序与NumPy向量化 + 部分选择
+
+python benchmarks/bench_rks.py
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+from benchmarks.fixtures import make_songs
+from catalog import SongCatalog
+
+REPEAT = 3
+
+
+def make_progress(count, seed=0, played=0.6):
+    """每首歌的 (完成度, X精准度)，未玩过的完成度为None"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        if rng.random() > played:
+            result.append((None, None))
+            continue
+        completion = rng.choice((rng.random(), 1, 1, 1))
+        result.append((completion, rng.choice((rng.uniform(0.9, 1), 1)) if completion >= 1 else 0))
+    return result
+
+
+def loop_rks(difficulties, progress):
+    """旧版 refresh_song_states 的方式：逐首计算，排序后取前20"""
+    rks_values = []
+    for difficulty, (completion, x_accuracy) in zip(difficulties, progress):
+        status, value = engine.classify(completion, x_accuracy)
+        rks_values.append(engine.song_rks(difficulty, status, value))
+    return sum(sorted(rks_values, reverse=True)[:engine.RKS_TOP]) / engine.RKS_TOP
+
+
+def vector_rks(difficulties, completion, x_accuracy):
+    status, value = engine.classify_arrays(completion, x_accuracy)
+    return engine.top_average(engine.rks_array(difficulties, status, value))
+
+
+def best_of(func, *args):
+    best = float('inf')
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    print(f'{"songs":>8} {"loop(ms)":>10} {"numpy(ms)":>10} {"speedup":>8}')
+    for count in (1000, 100000, 1000000):
+        catalog = SongCatalog.from_songs(make_songs(min(count, 100000)))
+        difficulties = [catalog.difficulty(index % len(catalog)) for index in range(count)]
+        progress = make_progress(count)
+        completion = np.array([np.nan if c is None else c for c, _ in progress])
+        x_accuracy = np.array([x or 0 for _, x in progress], dtype=np.float64)
+        difficulty_array = np.array(difficulties, dtype=np.float64)
+
+        loop_time, expected = best_of(loop_rks, difficulties, progress)
+        vector_time, result = best_of(vector_rks, difficulty_array, completion, x_accuracy)
+        assert abs(expected - result) < 1e-9, (expected, result)
+        print(f'{count:>8} {loop_time * 1000:>10.1f} {vector_time * 1000:>10.2f} {loop_time / vector_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+存档监视：连续写入的合并、发现变化的延迟，以及重新读取时留在界面线程中的耗时
+
+python benchmarks/bench_save_watcher.py
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_songs, make_custom_data
+from catalog import SongCatalog, SongRow
+from registry import SongRegistry
+from save_watcher import FileWatcher
+
+BURST = 20
+
+
+def write(path, data):
+    """与游戏一样先写临时文件再替换"""
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(f'{path}.tmp', path)
+
+
+def watch(use_inotify, poll_interval=0.05, debounce=0.1):
+    """连续写入 BURST 次，返回 (模式, 通知次数, 最后一次写入到通知的延迟)"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'custom_data.sav')
+        write(path, {})
+        notified = []
+        event = threading.Event()
+
+        def on_change(stat):
+            notified.append((time.perf_counter(), stat))
+            event.set()
+
+        watcher = FileWatcher(path, on_change, debounce=debounce, poll_interval=poll_interval,
+                              use_inotify=use_inotify)
+        watcher.start()
+        # 其他文件的变化不触发通知
+        write(os.path.join(directory, 'other.json'), {})
+        for i in range(BURST):
+            write(path, {'count': i})
+            time.sleep(0.005)
+        written = time.perf_counter()
+        assert event.wait(2)
+        time.sleep(debounce * 3)
+        watcher.stop()
+        return watcher.mode, len(notified), notified[0][0] - written
+
+
+def main():
+    print(f'{"mode":<8} {"writes":>7} {"callbacks":>10} {"latency(ms)":>12}')
+    for use_inotify in (True, False):
+        mode, count, latency = watch(use_inotify)
+        assert count == 1, count
+        print(f'{mode:<8} {BURST:>7} {count:>10} {latency * 1000:>12.1f}')
+
+    print(f'{"songs":>8} {"worker(ms)":>11} {"ui(ms)":>8}')
+    for count in (1000, 10000, 100000):
+        catalog = SongCatalog.from_songs(make_songs(count))
+        registry = SongRegistry()
+        for index in range(len(catalog)):
+            registry.add(SongRow(catalog, index))
+        md5_map = {workshop_id: hashlib.md5(workshop_id.encode()).hexdigest()
+                   for workshop_id in registry.workshop_ids()}
+        custom_data = make_custom_data(md5_map)
+        registry.load_states(custom_data, md5_map)
+        # 游玩一次后的存档：只有一个谱面变化
+        md5 = next(iter(md5_map.values()))
+        custom_data[f'CustomWorld_{md5}_Completion'] = 1
+        custom_data[f'CustomWorld_{md5}_XAccuracy'] = 0.95
+        text = json.dumps(custom_data)
+
+        start = time.perf_counter()
+        gathered = registry.gather(json.loads(text), md5_map)
+        worker = time.perf_counter() - start
+        start = time.perf_counter()
+        changed = registry.apply_states(gathered)
+        ui = time.perf_counter() - start
+        assert len(changed) >= 1
+        print(f'{count:>8} {worker * 1000:>11.1f} {ui * 1000:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+ScrollContentWidget 每帧耗时：旧的全量遍历与布局索引+二分查找
+以 offscreen 平台运行，不需要显示器
+
+python benchmarks/bench_scroll_frame.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+
+from benchmarks.fixtures import make_songs
+from catalog import SongCatalog, SongRow
+from enums import SortEnum
+from widget import ScrollContentWidget, RowWidget, DifficultyLabel
+
+FRAMES = 200
+
+
+class LegacyScrollContentWidget(ScrollContentWidget):
+    """旧版 refresh_window：每帧遍历全部数据"""
+
+    def update_layout(self):
+        self.total_label_delta = 0
+
+    def refresh_window(self):
+        pos = self.pos
+        for difficulty_label in self.difficulty_label_dict.values():
+            difficulty_label.hide()
+        self.delta = 30 if self.sort_text == SortEnum.DIFFICULTY else 0
+
+        label_delta = 0
+        last_difficulty = 0
+        for index, song_row in enumerate(self.data):
+            widget = song_row.widget
+            difficulty = song_row.difficulty
+            if difficulty != last_difficulty:
+                last_difficulty = difficulty
+                if self.sort_text == SortEnum.DIFFICULTY:
+                    if pos + self.item_height * index + label_delta > 0:
+                        difficulty_label = self.difficulty_label_dict.get(difficulty)
+                        if not difficulty_label:
+                            difficulty_label = DifficultyLabel(self, difficulty)
+                            self.difficulty_label_dict[difficulty] = difficulty_label
+                        difficulty_label.move(35, int(pos + self.item_height * index + label_delta))
+                        difficulty_label.show()
+                    label_delta += self.item_height
+            widget.setParent(self)
+            if difficulty in self.hide_difficulty and self.sort_text == SortEnum.DIFFICULTY:
+                label_delta -= self.item_height
+                widget.hide()
+            else:
+                widget_y = int(pos + self.item_height * index + label_delta)
+                if widget_y > self.height() or widget_y + self.item_height - self.delta < 0:
+                    widget.hide()
+                else:
+                    widget.move(0, widget_y)
+                    widget.setFixedWidth(self.width() - 12)
+                    widget.set_opacity(1)
+                    widget.show()
+        self.total_label_delta = label_delta
+
+
+def frame_time(widget_class, rows):
+    view = widget_class()
+    view.resize(800, 450)
+    view.anim_timer.stop()
+    view.update_info(rows, SortEnum.DIFFICULTY)
+    view.anim_timer.stop()
+    view.show()
+
+    content = len(rows) * view.item_height
+    start = time.perf_counter()
+    for frame in range(FRAMES):
+        view.pos = -(content * frame // FRAMES)
+        view.refresh_window()
+    elapsed = (time.perf_counter() - start) / FRAMES
+    for row in rows:
+        row.widget.hide()
+    return elapsed
+
+
+def main():
+    app = QApplication(sys.argv)
+    print(f'{"songs":>8} {"legacy(ms/frame)":>17} {"indexed(ms/frame)":>18}')
+    for count in (1000, 10000, 50000):
+        catalog = SongCatalog.from_songs(sorted(make_songs(count), key=lambda song: song['difficulty']))
+        rows = [SongRow(catalog, index) for index in range(count)]
+        for row in rows:
+            row.widget = RowWidget()
+        legacy = frame_time(LegacyScrollContentWidget, rows) * 1000 if count <= 10000 else float('nan')
+        indexed = frame_time(ScrollContentWidget, rows) * 1000
+        print(f'{count:>8} {legacy:>17.3f} {indexed:>18.3f}')
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
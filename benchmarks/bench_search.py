@@ -0,0 +1,110 @@
+"""
+逐字输入搜索词时每次按键的耗时：旧的全量小写匹配、搜索索引加全量筛选，与按排序取前 SEARCH_LIMIT 行
+
+python benchmarks/bench_search.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_songs
+from catalog import SongCatalog, SongRow
+from enums import SortEnum
+from registry import SongRegistry, filter_rows, select_rows
+
+QUERIES = ('song 12 night', 'artist7', 'ICE', 'a')
+SEARCH_LIMIT = 500
+ALL_STATES = (0, 1, 2, 3)
+
+
+def legacy_search(rows, query):
+    """旧版 update_visibility 的匹配方式"""
+    return {row.id for row in rows if query.lower() in (row.name + '\t' + row.artists).lower()}
+
+
+def make_registry(count, seed=0):
+    """随机设置状态和收藏的歌曲索引"""
+    rng = random.Random(seed)
+    catalog = SongCatalog.from_songs(make_songs(count))
+    registry = SongRegistry()
+    for index in range(count):
+        song_row = SongRow(catalog, index, is_star=rng.random() < 0.1)
+        song_row.status = (rng.randrange(4), 0)
+        registry.add(song_row)
+    return registry
+
+
+def filtered(registry, query, sort_text=SortEnum.DIFFICULTY, reverse=False, states=ALL_STATES, stars=False):
+    """上一版 update_visibility：搜索索引得到ID集合，再筛选整个顺序"""
+    matched_ids = registry.search_index.search(query)
+    return filter_rows(registry.sort_index.ordered(sort_text, reverse), states, matched_ids, stars)
+
+
+def selected(registry, query, sort_text=SortEnum.DIFFICULTY, reverse=False, states=ALL_STATES, stars=False,
+             limit=SEARCH_LIMIT):
+    return select_rows(registry.sort_index, sort_text, reverse, states, stars, registry.search_index, query, limit)
+
+
+def typing(search, query):
+    """逐字输入 query，返回每次按键的平均耗时"""
+    start = time.perf_counter()
+    for i in range(1, len(query) + 1):
+        search(query[:i])
+    return (time.perf_counter() - start) / len(query)
+
+
+def check():
+    """select_rows 的结果是全量筛选的前 limit 行；加载期间加入的歌曲也能搜到"""
+    registry = make_registry(3000)
+    for query in QUERIES + ('', 'zzz'):
+        for i in range(len(query) + 1):
+            for sort_text in (SortEnum.DIFFICULTY, SortEnum.NAME, SortEnum.RKS):
+                for reverse in (False, True):
+                    for states, stars in ((ALL_STATES, False), ((1, 2), False), (ALL_STATES, True)):
+                        expected = filtered(registry, query[:i], sort_text, reverse, states, stars)
+                        rows, more = selected(registry, query[:i], sort_text, reverse, states, stars, None)
+                        assert rows == expected and not more, (query[:i], sort_text, reverse)
+                        rows, more = selected(registry, query[:i], sort_text, reverse, states, stars, 50)
+                        assert rows == expected[:50] and more == (len(expected) > 50), (query[:i], sort_text)
+
+    # RKS 变化后按位置排列的结果也要更新
+    song_row = registry.rows[7]
+    registry.sort_index.reposition(7, song_row.rks, 5)
+    song_row.rks = 5
+    assert selected(registry, 'song 7 ', SortEnum.RKS)[0] == filtered(registry, 'song 7 ', SortEnum.RKS)
+
+    catalog = SongCatalog.from_songs(make_songs(20))
+    registry = SongRegistry()
+    for index in range(10):
+        registry.add(SongRow(catalog, index))
+    assert selected(registry, 'song 15')[0] == []
+    for index in range(10, 20):
+        registry.add(SongRow(catalog, index))
+    assert [row.id for row in selected(registry, 'song 15')[0]] == [16]
+
+
+def main():
+    check()
+    print(f'{"songs":>8} {"build(ms)":>10} {"legacy(ms/key)":>15} {"filter(ms/key)":>15} {"select(ms/key)":>15}')
+    for count in (1000, 10000, 100000):
+        start = time.perf_counter()
+        registry = make_registry(count)
+        build = time.perf_counter() - start
+        rows = registry.rows
+
+        legacy = full = limited = 0
+        for query in QUERIES:
+            legacy += typing(lambda q: legacy_search(rows, q), query)
+            full += typing(lambda q: filtered(registry, q), query)
+            registry.search_index.search('')
+            limited += typing(lambda q: selected(registry, q), query)
+            registry.search_index.search('')
+        print(f'{count:>8} {build * 1000:>10.1f} {legacy / len(QUERIES) * 1000:>15.3f} '
+              f'{full / len(QUERIES) * 1000:>15.3f} {limited / len(QUERIES) * 1000:>15.3f}')
+
+
+if __name__ == '__main__':
+    main()
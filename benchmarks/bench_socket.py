@@ -0,0 +1,84 @@
+"""
+与模组通信的往返延迟：旧的每条命令新建连接与持久连接，并检查重连和超时
+
+python benchmarks/bench_socket.py
+"""
+import os
+import socket
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SocketHandler import SocketHandler
+from benchmarks.fake_mod import FakeModServer
+
+CALLS = 2000
+
+
+def legacy_send_and_rec(port, data):
+    """旧版 send_and_rec：每次新建连接，读取一次 recv"""
+    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    client_socket.connect(('127.0.0.1', port))
+    client_socket.sendall(data.encode())
+    message = client_socket.recv(1024).decode().strip()
+    client_socket.close()
+    return message
+
+
+def latencies(call):
+    result = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        assert call() == '1.0.1'
+        result.append(time.perf_counter() - start)
+    return result
+
+
+def report(name, values):
+    values = sorted(values)
+    print(f'{name:<12} {statistics.mean(values) * 1e6:>9.1f} {values[len(values) // 2] * 1e6:>9.1f} '
+          f'{values[int(len(values) * 0.99)] * 1e6:>9.1f}')
+
+
+def check():
+    # 健康连接只建立一次
+    with FakeModServer() as server:
+        handler = SocketHandler(port=server.port)
+        for _ in range(10):
+            assert handler.get_version() == '1.0.1'
+        assert server.connections == 1
+
+    # 模组每次回复后关闭连接时自动重连
+    with FakeModServer(keep_alive=False) as server:
+        handler = SocketHandler(port=server.port)
+        for _ in range(5):
+            assert handler.is_connected()
+        assert server.commands == ['CONNECT'] * 5
+
+    # 模组不回复时在读取超时后失败
+    with FakeModServer(hang=2) as server:
+        handler = SocketHandler(port=server.port, read_timeout=0.2)
+        start = time.perf_counter()
+        assert not handler.is_connected()
+        assert time.perf_counter() - start < 1
+
+    # 模组未启动
+    with FakeModServer() as server:
+        port = server.port
+    assert not SocketHandler(port=port).is_connected()
+
+
+def main():
+    check()
+    print(f'{"":<12} {"mean(us)":>9} {"p50(us)":>9} {"p99(us)":>9}')
+    with FakeModServer(keep_alive=False) as server:
+        report('per-call', latencies(lambda: legacy_send_and_rec(server.port, 'VERSION\r\n')))
+    with FakeModServer() as server:
+        handler = SocketHandler(port=server.port)
+        report('persistent', latencies(handler.get_version))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+比较两种歌曲列表后端的启动耗时和内存：每首歌一组控件 / 模型+代理绘制
+每个测量在独立子进程中以 offscreen 平台运行
+
+python benchmarks/bench_song_list.py
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）"""
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                 ctypes.byref(counters), counters.cb)
+        return counters.PeakWorkingSetSize / 1024 / 1024
+
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+
+def build_rows(catalog, model_view, width):
+    """与 SongApp.create_all_widgets 相同的方式生成歌曲行"""
+    from catalog import SongRow
+    from widget import NameLabel, ArtistsLabel, StarsButton, DownloadButton, StatusLabel, RowWidget
+
+    rows = []
+    for index in range(len(catalog)):
+        row = SongRow(catalog, index)
+        if not model_view:
+            row.stars_button = StarsButton(song_id=row.id)
+            row.status_label = StatusLabel()
+            row_widget = RowWidget()
+            row_widget.setFixedWidth(width)
+            row_widget.add_widget(NameLabel(text=row.name))
+            row_widget.add_widget(ArtistsLabel(text=row.artists))
+            row_widget.add_widget(row.stars_button)
+            row_widget.add_widget(DownloadButton(url=row.workshop_url))
+            row_widget.add_widget(row.status_label)
+            row.widget = row_widget
+        rows.append(row)
+    return rows
+
+
+def run_child(backend, count):
+    from PyQt6.QtWidgets import QApplication
+
+    from benchmarks.fixtures import make_songs
+    from catalog import SongCatalog
+    from enums import SortEnum
+    from widget import ScrollContentWidget, SongListView
+
+    app = QApplication([])
+    songs = sorted(make_songs(count), key=lambda song: song['difficulty'])
+    catalog = SongCatalog.from_songs(songs)
+    base_rss = peak_rss_mb()
+
+    start = time.perf_counter()
+    model_view = backend == 'model'
+    rows = build_rows(catalog, model_view, 800)
+    view = SongListView() if model_view else ScrollContentWidget()
+    view.resize(800, 450)
+    view.update_info(rows, SortEnum.DIFFICULTY)
+    view.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({'seconds': elapsed, 'rss_mb': peak_rss_mb() - base_rss}))
+
+
+def main():
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    print(f'{"songs":>8} {"backend":>8} {"startup(s)":>11} {"RSS(MB)":>9}')
+    for count in (1000, 10000, 100000):
+        for backend in ('widgets', 'model'):
+            output = subprocess.run([sys.executable, __file__, '--child', backend, str(count)],
+                                    env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f'{count:>8} {backend:>8} {result["seconds"]:>11.2f} {result["rss_mb"]:>9.1f}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        run_child(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
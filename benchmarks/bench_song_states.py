@@ -0,0 +1,79 @@
+"""
+加载歌曲状态的耗时：旧的嵌套查找 O(n²) 与歌曲索引 O(n)
+
+python benchmarks/bench_song_states.py
+"""
+import hashlib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_songs, make_custom_data
+from catalog import SongCatalog, SongRow
+from registry import SongRegistry
+
+# 旧实现超过该数量后耗时过长，不再测量
+NESTED_LIMIT = 5000
+
+
+def make_rows(catalog):
+    return [SongRow(catalog, index) for index in range(len(catalog))]
+
+
+def nested_load_states(songs, song_widgets, cd, md5_map):
+    """旧版 SongApp.load_song_states 的查找方式"""
+    for song in songs:
+        widget = None
+        for w in song_widgets:
+            if w.id == song['id']:
+                widget = w
+                break
+        if not widget:
+            continue
+        md5 = md5_map.get(song['workshopUrl'].split('&')[0].split('=')[-1])
+        if md5 is None:
+            continue
+        completion = cd.get(f'CustomWorld_{md5}_Completion')
+        x_accuracy = cd.get(f'CustomWorld_{md5}_XAccuracy')
+        if completion is None:
+            widget.status = (0, 0)
+        elif completion < 1:
+            widget.status = (1, completion)
+        elif x_accuracy >= 1:
+            widget.status = (3, 0)
+            widget.rks = widget.difficulty
+        else:
+            widget.status = (2, x_accuracy)
+            widget.rks = widget.difficulty * x_accuracy * x_accuracy
+
+
+def main():
+    print(f'{"songs":>8} {"nested(ms)":>11} {"registry(ms)":>13} {"registry us/song":>17}')
+    for count in (1000, 5000, 10000, 50000, 100000):
+        songs = make_songs(count)
+        catalog = SongCatalog.from_songs(songs)
+        rows = make_rows(catalog)
+        md5_map = {row.workshop_id: hashlib.md5(row.workshop_id.encode()).hexdigest() for row in rows}
+        cd = make_custom_data(md5_map)
+
+        nested = '-'
+        if count <= NESTED_LIMIT:
+            start = time.perf_counter()
+            nested_load_states(songs, rows, cd, md5_map)
+            nested = f'{(time.perf_counter() - start) * 1000:.1f}'
+
+        registry = SongRegistry()
+        for row in make_rows(catalog):
+            registry.add(row)
+        start = time.perf_counter()
+        registry.load_states(cd, md5_map)
+        elapsed = time.perf_counter() - start
+        if count <= NESTED_LIMIT:
+            assert [(r.status, r.rks) for r in rows] == [(r.status, r.rks) for r in registry]
+        print(f'{count:>8} {nested:>11} {elapsed * 1000:>13.1f} {elapsed / count * 1e6:>17.2f}')
+
+
+if __name__ == '__main__':
+    main()
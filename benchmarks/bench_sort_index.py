@@ -0,0 +1,99 @@
+"""
+预先排好的排序顺序与每次用 sorted 重新排序的比较：切换排序、切换方向和单首歌RKS变化
+
+python benchmarks/bench_sort_index.py [歌曲数]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import make_songs
+from catalog import SongCatalog, SongRow
+from enums import SortEnum
+from registry import SortIndex
+
+SORT_KEYS = {
+    SortEnum.DIFFICULTY: lambda x: x.difficulty,
+    SortEnum.NAME: lambda x: x.name,
+    SortEnum.ARTISTS: lambda x: x.artists,
+    SortEnum.RKS: lambda x: x.rks,
+}
+
+
+def make_rows(count, seed=0):
+    rng = random.Random(seed)
+    catalog = SongCatalog.from_songs(make_songs(count, seed))
+    rows = []
+    for index in range(len(catalog)):
+        song_row = SongRow(catalog, index)
+        song_row.rks = rng.choice((0, 0, round(rng.uniform(0, 25), 2)))
+        rows.append(song_row)
+    return rows
+
+
+def check(count=2000, seed=1):
+    """与 sorted 的结果一致（升序稳定；降序为升序倒序），加载期间追加行与RKS变化后仍一致"""
+    rng = random.Random(seed)
+    rows = make_rows(count, seed)
+    half = rows[:count // 2]
+    index = SortIndex(half)
+    for sort_text in SORT_KEYS:
+        list(index.ordered(sort_text))
+    half.extend(rows[count // 2:])
+
+    for _ in range(300):
+        slot = rng.randrange(count)
+        rks = rng.choice((0, rows[rng.randrange(count)].rks, round(rng.uniform(0, 25), 2)))
+        if rows[slot].rks != rks:
+            index.reposition(slot, rows[slot].rks, rks)
+            rows[slot].rks = rks
+
+    for sort_text, key in SORT_KEYS.items():
+        # 歌曲行按下标排列，稳定排序中相同键按下标排列
+        expected = sorted(rows, key=key)
+        assert list(index.ordered(sort_text)) == expected, sort_text
+        assert list(index.ordered(sort_text, True)) == expected[::-1], sort_text
+
+
+def timed(func, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main():
+    check()
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rows = make_rows(count)
+    index = SortIndex(rows)
+    for sort_text in SORT_KEYS:
+        list(index.ordered(sort_text))
+
+    print(f'{count} songs, switch sort / direction (ms):')
+    for sort_text, key in SORT_KEYS.items():
+        resort = timed(lambda: sorted(rows, key=key, reverse=True))
+        switch = timed(lambda: list(index.ordered(sort_text, True)))
+        print(f'  {sort_text:<8} sorted {resort:8.2f}   index {switch:8.2f}')
+
+    rng = random.Random(2)
+    slots = [rng.randrange(count) for _ in range(1000)]
+
+    def reposition():
+        for slot in slots:
+            rks = round(rng.uniform(0, 25), 2)
+            index.reposition(slot, rows[slot].rks, rks)
+            rows[slot].rks = rks
+
+    print(f'one RKS change: resort {timed(lambda: sorted(rows, key=SORT_KEYS[SortEnum.RKS])):.2f} ms, '
+          f'reposition {timed(reposition, 1) / len(slots) * 1000:.2f} us')
+
+
+if __name__ == '__main__':
+    main()
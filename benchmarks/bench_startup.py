@@ -0,0 +1,100 @@
+"""
+启动耗时：python -X importtime 的导入耗时 + offscreen 平台下显示窗口和加载完歌曲列表的时间，
+以及加载期间界面最长无响应的时间
+
+python benchmarks/bench_startup.py [--save 基准.json] [--compare 基准.json]
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 与基准相比超过该比例视为退化
+TOLERANCE = 0.2
+REPEAT = 3
+
+_importtime_line = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def run(args):
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    return subprocess.run([sys.executable, *args], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def import_times():
+    """{模块: 累计导入耗时(ms)}，只统计顶层导入"""
+    stderr = run(['-X', 'importtime', '-c', 'import main']).stderr
+    times = {}
+    for line in stderr.splitlines():
+        match = _importtime_line.match(line)
+        if match and len(match.group(3)) == 1:
+            times[match.group(4)] = int(match.group(2)) / 1000
+    return times
+
+
+def run_child():
+    start = time.perf_counter()
+    import main
+    from PyQt6.QtWidgets import QApplication
+
+    imported = time.perf_counter()
+    app = QApplication(sys.argv[:1])
+    window = main.SongApp(deferred=True)
+    window.show()
+    app.processEvents()
+    shown = time.perf_counter()
+    # 加载期间事件循环单次处理的最长时间，即界面最长无响应的时间
+    max_stall = 0
+    while not window.populated:
+        before = time.perf_counter()
+        app.processEvents()
+        max_stall = max(max_stall, time.perf_counter() - before)
+    populated = time.perf_counter()
+    print(json.dumps({
+        'import_ms': (imported - start) * 1000,
+        'window_ms': (shown - start) * 1000,
+        'populated_ms': (populated - start) * 1000,
+        'max_stall_ms': max_stall * 1000,
+    }))
+
+
+def headless_times():
+    """多次运行取最小值"""
+    results = [json.loads(run([__file__, '--child']).stdout.strip().splitlines()[-1]) for _ in range(REPEAT)]
+    return {key: min(result[key] for result in results) for key in results[0]}
+
+
+def main():
+    imports = import_times()
+    result = headless_times()
+    result['import_main_ms'] = imports.get('main', 0)
+
+    print('slowest top-level imports:')
+    for name, ms in sorted(imports.items(), key=lambda item: -item[1])[:10]:
+        print(f'  {name:<30} {ms:8.1f} ms')
+    for key, value in result.items():
+        print(f'{key:<16} {value:8.1f} ms')
+
+    args = sys.argv[1:]
+    if '--save' in args:
+        with open(args[args.index('--save') + 1], 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=4)
+    if '--compare' in args:
+        with open(args[args.index('--compare') + 1], 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = [key for key, value in result.items()
+                       if key in baseline and value > baseline[key] * (1 + TOLERANCE)]
+        for key in regressions:
+            print(f'regression: {key} {baseline[key]:.1f} -> {result[key]:.1f} ms')
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, ROOT)
+    if sys.argv[1:] == ['--child']:
+        run_child()
+    else:
+        main()
@@ -0,0 +1,66 @@
+"""
+单首歌成绩变化后更新总RKS的耗时：每次全量重新计算与增量维护的前20名
+
+python benchmarks/bench_top_rks.py
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+
+UPDATES = 2000
+
+
+def check(rng):
+    """随机更新后与暴力计算的结果比较"""
+    values = {key: rng.choice((0, rng.uniform(0, 22))) for key in range(300)}
+    top = engine.TopRks(values.items())
+    for _ in range(5000):
+        key = rng.randrange(len(values))
+        rks = rng.choice((0, values[key], rng.uniform(0, 22)))
+        expected_gain = (engine.average_rks({**values, key: rks}.values())
+                         - engine.average_rks(values.values()))
+        assert abs(top.gain(key, rks) - expected_gain) < 1e-9
+        values[key] = rks
+        top.update(key, rks)
+        assert abs(top.average() - engine.average_rks(values.values())) < 1e-9
+
+
+def main():
+    rng = random.Random(0)
+    check(rng)
+    print(f'{"songs":>8} {"recompute(us)":>14} {"incremental(us)":>16} {"gain(us)":>9}')
+    for count in (1000, 100000, 1000000):
+        rks = np.array([rng.choice((0, rng.uniform(0, 22))) for _ in range(count)])
+        updates = [(rng.randrange(count), rng.uniform(0, 22.5)) for _ in range(UPDATES)]
+
+        values = rks.copy()
+        recompute_updates = updates[:max(UPDATES * 1000 // count, 20)]
+        start = time.perf_counter()
+        for key, value in recompute_updates:
+            values[key] = value
+            engine.top_average(values)
+        recompute = (time.perf_counter() - start) / len(recompute_updates)
+
+        top = engine.TopRks(enumerate(rks.tolist()))
+        start = time.perf_counter()
+        for key, value in updates:
+            top.update(key, value)
+        incremental = (time.perf_counter() - start) / UPDATES
+
+        start = time.perf_counter()
+        for key, value in updates:
+            top.gain(key, value)
+        gain = (time.perf_counter() - start) / UPDATES
+
+        print(f'{count:>8} {recompute * 1e6:>14.1f} {incremental * 1e6:>16.2f} {gain * 1e6:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+追踪的开销：关闭时 traced / span / count 与直接调用相比多出的时间，以及开启后写出的追踪文件
+
+python benchmarks/bench_tracing.py
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import tracing
+
+CALLS = 1_000_000
+
+
+def work(x):
+    return x + 1
+
+
+traced_work = tracing.traced()(work)
+
+
+def with_span(x):
+    with tracing.span('work'):
+        return x + 1
+
+
+def with_count(x):
+    tracing.count('calls')
+    return x + 1
+
+
+def per_call(func):
+    """每次调用的耗时（ns），取三次中最短的"""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter_ns()
+        for i in range(CALLS):
+            func(i)
+        elapsed = (time.perf_counter_ns() - start) / CALLS
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def check_trace():
+    """开启追踪运行 suite 的最小规模，检查追踪文件中的区间和计数"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'trace.json')
+        env = dict(os.environ, ADOFAI_TRACE=path)
+        subprocess.run([sys.executable, os.path.join(ROOT, 'benchmarks', 'suite.py'), '--sizes', '500',
+                        '--levels', '20', '--repeat', '1'], env=env, check=True, capture_output=True)
+        with open(path, 'r', encoding='utf-8') as f:
+            trace = json.load(f)
+
+    events = trace['traceEvents']
+    spans = {event['name'] for event in events if event['ph'] == 'X'}
+    assert 'MD5Handler.warm_up' in spans, spans
+    assert all(event['dur'] >= 0 for event in events if event['ph'] == 'X')
+    counters = trace['otherData']['counters']
+    assert counters['files_read'] >= 20, counters
+    assert counters['md5_cache_hits'] > 0, counters
+    return len(events), counters
+
+
+def main():
+    assert not tracing.enabled()
+    bare = per_call(work)
+    print(f'disabled, per call overhead vs direct call ({CALLS} calls):')
+    for name, func in (('traced', traced_work), ('span', with_span), ('count', with_count)):
+        print(f'  {name:<8} {per_call(func) - bare:8.1f} ns')
+
+    tracing.enable(os.devnull)
+    print('enabled:')
+    for name, func in (('traced', traced_work), ('span', with_span), ('count', with_count)):
+        print(f'  {name:<8} {per_call(func) - bare:8.1f} ns')
+    # 不写出内存中收集的几百万个事件
+    tracing._tracer = None
+
+    events, counters = check_trace()
+    print(f'trace file: {events} events, counters {counters}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+本地模拟的下载服务器：支持 Range，可以注入传输中断和延迟
+"""
+import http.server
+import re
+import threading
+import time
+
+_range = re.compile(r'bytes=(\d+)-')
+
+
+class FakeHTTPHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get('Range')))
+        if server.latency:
+            time.sleep(server.latency)
+        data = server.files.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+
+        start = 0
+        match = _range.fullmatch(self.headers.get('Range') or '')
+        if match and server.support_range:
+            start = int(match.group(1))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(data)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(data) - 1}/{len(data)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(data) - start))
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.end_headers()
+
+        body = data[start:]
+        with server.lock:
+            cut = server.cut_after.pop(self.path, None)
+        if cut is not None:
+            # 只发送一部分后断开
+            self.wfile.write(body[:cut])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeHTTPServer(http.server.ThreadingHTTPServer):
+    """
+    files: {路径: 内容}；cut_after: {路径: 字节数}，该路径下一次请求只发送这么多字节后断开
+    latency 为每个请求开始前等待的秒数；作为上下文管理器使用时在后台线程中运行
+    """
+    daemon_threads = True
+
+    def __init__(self, files, support_range=True, latency=0):
+        super().__init__(('127.0.0.1', 0), FakeHTTPHandler)
+        self.files = files
+        self.support_range = support_range
+        self.latency = latency
+        self.cut_after = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
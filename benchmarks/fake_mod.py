@@ -0,0 +1,124 @@
+"""
+本地模拟的模组服务端，响应 CONNECT / VERSION / LOAD_LEVEL 命令
+"""
+import asyncio
+import socketserver
+import threading
+
+
+def reply_to(command, version):
+    if command == 'VERSION':
+        return version
+    if command.startswith('LOAD_LEVEL'):
+        return 'OK'
+    return 'CONNECTED'
+
+
+class FakeModHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        for line in self.rfile:
+            command = line.decode().strip()
+            server.commands.append(command)
+            if server.hang:
+                # 模拟卡住的模组：不回复
+                threading.Event().wait(server.hang)
+                return
+            self.wfile.write(f'{reply_to(command, server.version)}\r\n'.encode())
+            if not server.keep_alive:
+                return
+
+
+class FakeModServer(socketserver.ThreadingTCPServer):
+    """
+    keep_alive 为False时每次回复后关闭连接；hang 为回复前等待的秒数（不回复）
+    作为上下文管理器使用时在后台线程中运行
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, version='1.0.1', keep_alive=True, hang=0, port=0):
+        super().__init__(('127.0.0.1', port), FakeModHandler)
+        self.version = version
+        self.keep_alive = keep_alive
+        self.hang = hang
+        self.commands = []
+        self.connections = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class AsyncFakeMod:
+    """
+    asyncio 版本的模拟模组，在调用方的事件循环中运行
+    按收到的顺序逐行回复，可以处理流水线请求；delay 为每条回复前等待的秒数，
+    silent 为不回复的命令数（从第一条开始，模拟没有响应的模组）
+    """
+
+    def __init__(self, version='1.0.1', delay=0, silent=0):
+        self.version = version
+        self.delay = delay
+        self.silent = silent
+        self.server = None
+        self.commands = 0
+        self.connections = 0
+        # 发送了 SUBSCRIBE 的连接
+        self.subscribers = set()
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while line := await reader.readline():
+                self.commands += 1
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                command = line.decode().strip()
+                if self.silent:
+                    self.silent -= 1
+                    continue
+                if command == 'SUBSCRIBE':
+                    writer.write(b'SUBSCRIBED\r\n')
+                    self.subscribers.add(writer)
+                else:
+                    writer.write(f'{reply_to(command, self.version)}\r\n'.encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def push(self, md5, completion, x_accuracy):
+        """向所有订阅者推送一个进度事件"""
+        for writer in list(self.subscribers):
+            writer.write(f'PROGRESS {md5} {completion!r} {x_accuracy!r}\r\n'.encode())
+            await writer.drain()
+
+    def drop_subscribers(self):
+        """断开所有订阅连接，模拟推送中断"""
+        for writer in list(self.subscribers):
+            writer.close()
+        self.subscribers.clear()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
@@ -0,0 +1,80 @@
+"""
+基准测试用的合成数据生成
+"""
+import random
+
+
+def make_adofai_text(tiles=20000, actions=5000, author='Author', artist='Artist', song='Song', seed=0):
+    """生成与游戏存档格式相近的 main.adofai 文本（含尾随逗号）"""
+    rng = random.Random(seed)
+    angle_data = ', '.join(str(rng.choice((0, 45, 90, 180, 270, 315))) for _ in range(tiles))
+    lines = [
+        '{',
+        f'\t"angleData": [{angle_data}], ',
+        '\t"settings":',
+        '\t{',
+        '\t\t"version": 13 ,',
+        f'\t\t"artist": "{_escape(artist)}", ',
+        '\t\t"specialArtistType": "None", ',
+        '\t\t"artistPermission": "", ',
+        f'\t\t"song": "{_escape(song)}", ',
+        f'\t\t"author": "{_escape(author)}", ',
+        '\t\t"separateCountdownTime": "Enabled", ',
+        '\t\t"previewImage": "", ',
+        '\t\t"songFilename": "song.ogg", ',
+        '\t\t"bpm": 200, ',
+        '\t},',
+        '\t"actions":',
+        '\t[',
+    ]
+    for i in range(actions):
+        floor = rng.randrange(1, max(tiles, 2))
+        lines.append(
+            f'\t\t{{ "floor": {floor}, "eventType": "SetSpeed", "speedType": "Bpm", '
+            f'"beatsPerMinute": {rng.randrange(60, 2000)}, "bpmMultiplier": 1, "angleOffset": 0 }},'
+        )
+    lines += ['\t],', '\t"decorations":', '\t[', '\t]', '}']
+    return '\n'.join(lines)
+
+
+def write_adofai(path, **kwargs):
+    """写出合成谱面文件（带BOM，与游戏一致）"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        f.write(make_adofai_text(**kwargs))
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def make_songs(count, seed=0):
+    """生成与 levels_info.json 结构一致的歌曲列表"""
+    rng = random.Random(seed)
+    songs = []
+    for i in range(count):
+        difficulty = rng.choice((rng.randint(1, 20), round(rng.uniform(18, 22.5), 1)))
+        name = f'Song {i} {rng.choice(("Crystal", "Night", "Fire", "Ice", "BPM"))}'
+        artists = [f'Artist{rng.randrange(max(count // 4, 1))}' for _ in range(rng.randint(1, 3))]
+        songs.append({
+            'id': i + 1,
+            'name': name,
+            'difficulty': difficulty,
+            'music': {'name': name, 'artists': artists},
+            'creators': [f'Creator{rng.randrange(max(count // 8, 1))}'],
+            'maxBpm': rng.randrange(0, 3000),
+            'workshopUrl': f'https://steamcommunity.com/sharedfiles/filedetails/?id={2000000000 + i}',
+        })
+    return songs
+
+
+def make_custom_data(md5_map, seed=0, played=0.6):
+    """为 {创意工坊ID: MD5} 生成存档数据，played 为玩过的比例"""
+    rng = random.Random(seed)
+    custom_data = {}
+    for md5 in md5_map.values():
+        if rng.random() > played:
+            continue
+        completion = rng.choice((rng.random(), 1, 1, 1))
+        custom_data[f'CustomWorld_{md5}_Completion'] = completion
+        custom_data[f'CustomWorld_{md5}_XAccuracy'] = rng.choice((rng.uniform(0.9, 1), 1)) if completion >= 1 else 0
+    return custom_data
@@ -0,0 +1,233 @@
+"""
+完整流程的合成数据基准：生成与 levels_info.json 结构一致的目录、Steam 目录结构（创意工坊谱面和 custom_data.sav），
+计时目录加载、MD5解析、存档读取、状态计算、排序、筛选和无界面的列表布局
+结果以JSON输出到标准输出，可以保存为基准并与之后的提交比较
+
+python benchmarks/suite.py [--sizes 1000,10000,100000,1000000] [--levels 200] [--repeat 3]
+                           [--save 基准.json] [--compare 基准.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import FileHandler
+import MD5Handler
+import list_layout
+from benchmarks.bench_md5_warm_up import make_workshop
+from benchmarks.fixtures import make_songs, make_custom_data
+from catalog import SongRow
+from enums import SortEnum
+from registry import SongRegistry, SearchIndex, SortIndex, filter_rows, select_rows
+
+# 与基准相比超过该比例视为退化
+TOLERANCE = 0.2
+ITEM_HEIGHT = 30
+VIEWPORT_HEIGHT = 500
+# 布局后模拟滚动的帧数
+FRAMES = 1000
+SEARCH_QUERY = 'fire'
+# 与 main.SEARCH_LIMIT 一致
+SEARCH_LIMIT = 500
+
+
+def make_steam_tree(root, levels):
+    """
+    生成 Steam 目录结构：创意工坊中前 levels 首歌的谱面，以及游戏存档目录
+    返回 {创意工坊ID: MD5}
+    """
+    workshop_root = os.path.join(root, 'steamapps', 'workshop', 'content', '977950')
+    os.makedirs(workshop_root)
+    os.makedirs(os.path.join(root, 'steamapps', 'common', 'A Dance of Fire and Ice', 'User'))
+    level_paths = make_workshop(workshop_root, levels)
+    return {workshop_id: MD5Handler.md5_of_level(path) for workshop_id, path in level_paths.items()}
+
+
+def write_custom_data(path, md5_map):
+    """与游戏一致，带BOM"""
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        json.dump(make_custom_data(md5_map), f)
+
+
+def best_of(repeat, func, setup=None):
+    """运行 repeat 次，返回 (最短耗时(ms), 最后一次的结果)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def run_size(tmp, size, level_md5, repeat):
+    times = {}
+    FileHandler.data_file_path = os.path.join(tmp, f'levels_info_{size}.json')
+    FileHandler.snapshot_file_path = os.path.join(tmp, f'levels_info_{size}.snapshot')
+    with open(FileHandler.data_file_path, 'w', encoding='utf-8') as f:
+        json.dump(make_songs(size), f, ensure_ascii=False)
+
+    # 目录
+    times['catalog_json'], catalog = best_of(repeat, FileHandler.load_song_data,
+                                             lambda: remove(FileHandler.snapshot_file_path))
+    times['catalog_snapshot'], catalog = best_of(repeat, FileHandler.load_song_data)
+    assert len(catalog) == size
+
+    # MD5：创意工坊中只有前 levels 首歌的谱面，其余的路径不存在
+    workshop_ids = [catalog.workshop_id(index) for index in range(size)]
+    level_paths = {workshop_id: FileHandler.get_adofai_path(workshop_id) for workshop_id in workshop_ids}
+    times['md5_cold'], _ = best_of(repeat, lambda: MD5Handler.MD5Cache().resolve(level_paths))
+    md5_cache = MD5Handler.MD5Cache()
+    md5_cache.resolve(level_paths)
+    times['md5_warm'], md5_map = best_of(repeat, lambda: md5_cache.resolve(level_paths))
+    assert md5_map == {workshop_id: md5 for workshop_id, md5 in level_md5.items() if workshop_id in level_paths}
+
+    # 存档：除了创意工坊中的谱面，还包含其余歌曲（已取消订阅）的记录，大小与目录成比例
+    full_md5_map = {workshop_id: hashlib.md5(workshop_id.encode()).hexdigest() for workshop_id in workshop_ids}
+    full_md5_map.update(md5_map)
+    write_custom_data(FileHandler.get_custom_data_path(), full_md5_map)
+    times['save_parse'], custom_data = best_of(repeat, FileHandler.load_custom_data)
+
+    # 歌曲行与状态
+    def make_registry():
+        registry = SongRegistry()
+        for index in range(size):
+            registry.add(SongRow(catalog, index))
+        return registry
+
+    times['rows'], registry = best_of(repeat, make_registry)
+    times['states'], _ = best_of(repeat, lambda: registry.load_states(custom_data, full_md5_map),
+                                 lambda: setattr(registry, 'states', None))
+    times['average_rks'], _ = best_of(repeat, registry.average_rks)
+    rows = registry.rows
+
+    # 排序：第一次使用时生成顺序，之后切换排序或方向只遍历；RKS 变化时移动单首歌
+    sort_texts = (('difficulty', SortEnum.DIFFICULTY), ('name', SortEnum.NAME),
+                  ('artists', SortEnum.ARTISTS), ('rks', SortEnum.RKS))
+    for key, sort_text in sort_texts:
+        times[f'sort_index_{key}'], _ = best_of(repeat, lambda: list(SortIndex(rows).ordered(sort_text)))
+    sort_index = registry.sort_index
+    for key, sort_text in sort_texts:
+        list(sort_index.ordered(sort_text))
+        times[f'sort_switch_{key}'], _ = best_of(repeat, lambda: list(sort_index.ordered(sort_text, True)))
+    updates = [(slot, rows[slot].rks, rows[slot].rks + 1) for slot in range(0, size, max(size // 100, 1))]
+
+    def reposition():
+        for slot, old_rks, rks in updates:
+            sort_index.reposition(slot, old_rks, rks)
+        for slot, old_rks, rks in updates:
+            sort_index.reposition(slot, rks, old_rks)
+        return len(updates) * 2
+
+    elapsed, moves = best_of(repeat, reposition)
+    times['rks_reposition'] = elapsed / moves
+    rows = list(sort_index.ordered(SortEnum.DIFFICULTY))
+
+    # 筛选
+    times['search_index'], search_index = best_of(repeat, lambda: SearchIndex(rows))
+    times['search'], matched_ids = best_of(repeat, lambda: search_index.search(SEARCH_QUERY),
+                                           lambda: search_index.search(''))
+    times['filter_states'], visible = best_of(repeat, lambda: filter_rows(rows, (1, 2, 3)))
+    times['filter_search'], _ = best_of(repeat, lambda: filter_rows(rows, (0, 1, 2, 3), matched_ids))
+    # 界面中的筛选：按排序取前 SEARCH_LIMIT 个匹配
+    times['select_search'], _ = best_of(repeat, lambda: select_rows(
+        sort_index, SortEnum.DIFFICULTY, False, (0, 1, 2, 3), False, registry.search_index, SEARCH_QUERY, SEARCH_LIMIT))
+
+    # 布局：按难度分组并折叠一个难度，之后模拟 FRAMES 帧滚动，每帧查找视口内的行
+    hide_difficulty = {rows[len(rows) // 2].difficulty} if rows else set()
+    times['layout'], layout = best_of(
+        repeat, lambda: list_layout.build_layout(rows, ITEM_HEIGHT, True, hide_difficulty))
+    row_offsets, _, header_offsets, _, total = layout
+
+    def scroll():
+        shown = 0
+        for frame in range(FRAMES):
+            top = total * frame // FRAMES
+            shown += len(list_layout.visible_range(row_offsets, top - ITEM_HEIGHT, top + VIEWPORT_HEIGHT))
+            shown += len(list_layout.visible_range(header_offsets, top - ITEM_HEIGHT, top + VIEWPORT_HEIGHT))
+        return shown
+
+    elapsed, shown = best_of(repeat, scroll)
+    times['frame'] = elapsed / FRAMES
+    assert shown <= FRAMES * (VIEWPORT_HEIGHT // ITEM_HEIGHT + 2)
+
+    return {
+        'times_ms': times,
+        'counts': {
+            'songs': size,
+            'resolved': len(md5_map),
+            'save_entries': len(custom_data),
+            'visible_played': len(visible),
+            'search_matches': len(matched_ids),
+            'layout_rows': len(row_offsets),
+        },
+    }
+
+
+def compare(result, baseline):
+    """返回比基准慢 TOLERANCE 以上的 [(歌曲数, 指标, 基准, 当前)]"""
+    regressions = []
+    for size, entry in result['sizes'].items():
+        base_times = baseline.get('sizes', {}).get(size, {}).get('times_ms', {})
+        for key, value in entry['times_ms'].items():
+            if key in base_times and value > base_times[key] * (1 + TOLERANCE):
+                regressions.append((size, key, base_times[key], value))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='目录中的歌曲数，逗号分隔')
+    parser.add_argument('--levels', type=int, default=200, help='创意工坊中的谱面数')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='把结果写入该文件作为基准')
+    parser.add_argument('--compare', help='与该基准比较，有退化时返回1')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        steam_root = os.path.join(tmp, 'Steam')
+        os.environ['ADOFAI_STEAM_PATH'] = steam_root
+        FileHandler.get_steam_path.cache_clear()
+        start = time.perf_counter()
+        level_md5 = make_steam_tree(steam_root, min(args.levels, max(sizes)))
+        print(f'generated {len(level_md5)} levels in {time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+        result = {'levels': len(level_md5), 'repeat': args.repeat, 'sizes': {}}
+        for size in sizes:
+            entry = run_size(tmp, size, level_md5, args.repeat)
+            result['sizes'][str(size)] = entry
+            print(f'{size} songs:', file=sys.stderr)
+            for key, value in entry['times_ms'].items():
+                print(f'  {key:<24} {value:10.3f} ms', file=sys.stderr)
+
+    print(json.dumps(result, indent=4))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=4)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline)
+        for size, key, before, after in regressions:
+            print(f'regression: {size} songs {key} {before:.3f} -> {after:.3f} ms', file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import mmap
+import os
+import struct
+from array import array
+
+# 快照文件头：标识、版本、源文件修改时间、源文件大小、歌曲数、字符串表字节数
+SNAPSHOT_MAGIC = b'ADFC'
+SNAPSHOT_VERSION = 1
+_snapshot_header = struct.Struct('<4sHqqIQ')
+
+
+def _number(value):
+    """整数值还原为int，保持与JSON中相同的显示"""
+    return int(value) if value.is_integer() else value
+
+
+class SongCatalog:
+    """
+    紧凑的歌曲目录
+    数值字段按列存放在 array 中；字符串去重后存放在字符串表中，列中只保存下标
+    """
+
+    def __init__(self):
+        self.ids = array('q')
+        self.difficulties = array('d')
+        self.max_bpms = array('d')
+        self.names = array('i')
+        self.artists = array('i')
+        self.creators = array('i')
+        self.workshop_ids = array('i')
+        self.workshop_urls = array('i')
+
+        self.strings = []
+        self._string_index = {}
+
+    @classmethod
+    def from_songs(cls, songs):
+        """由 levels_info.json 中的歌曲列表生成目录"""
+        catalog = cls()
+        for song in songs:
+            catalog.add(song)
+        catalog.release_index()
+        return catalog
+
+    def release_index(self):
+        """释放字符串去重用的索引，之后添加歌曲时重新生成"""
+        self._string_index = None
+
+    def intern(self, text):
+        if self._string_index is None:
+            self._string_index = {string: index for index, string in enumerate(self.strings)}
+        index = self._string_index.get(text)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(text)
+            self._string_index[text] = index
+        return index
+
+    def add(self, song):
+        workshop_url = song['workshopUrl'].strip()
+        self.ids.append(song['id'])
+        self.difficulties.append(song.get('difficulty', 0))
+        self.max_bpms.append(song.get('maxBpm', 0))
+        self.names.append(self.intern(song['music']['name']))
+        self.artists.append(self.intern(', '.join(song['music']['artists'])))
+        self.creators.append(self.intern(', '.join(song.get('creators', []))))
+        self.workshop_ids.append(self.intern(workshop_url.split('&')[0].split('=')[-1]))
+        self.workshop_urls.append(self.intern(workshop_url))
+
+    def columns(self):
+        return (self.ids, self.difficulties, self.max_bpms, self.names,
+                self.artists, self.creators, self.workshop_ids, self.workshop_urls)
+
+    def save_snapshot(self, path, source_key):
+        """
+        写出二进制快照，source_key 为源JSON的 (修改时间, 大小)
+        字符串中含有分隔符时不写出，返回是否成功
+        """
+        if any('\0' in string for string in self.strings):
+            return False
+        blob = '\0'.join(self.strings).encode('utf-8')
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_snapshot_header.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, source_key[0], source_key[1],
+                                          len(self), len(blob)))
+            for column in self.columns():
+                column.tofile(f)
+            f.write(blob)
+        os.replace(temp_path, path)
+        return True
+
+    @classmethod
+    def load_snapshot(cls, path, source_key):
+        """
+        通过内存映射读取快照，每列只分配一个数组
+        快照不存在、损坏或与源JSON不一致时返回None
+        """
+        try:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) < _snapshot_header.size:
+                    return None
+                magic, version, mtime, size, count, blob_size = _snapshot_header.unpack_from(mm)
+                if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or (mtime, size) != tuple(source_key):
+                    return None
+
+                catalog = cls()
+                offset = _snapshot_header.size
+                for column in catalog.columns():
+                    end = offset + count * column.itemsize
+                    column.frombytes(mm[offset:end])
+                    offset = end
+                if offset + blob_size != len(mm):
+                    return None
+                catalog.strings = mm[offset:].decode('utf-8').split('\0') if count else []
+        except (OSError, ValueError, struct.error):
+            return None
+
+        catalog.release_index()
+        return catalog
+
+    def song_id(self, index):
+        return self.ids[index]
+
+    def difficulty(self, index):
+        return _number(self.difficulties[index])
+
+    def max_bpm(self, index):
+        return _number(self.max_bpms[index])
+
+    def name(self, index):
+        return self.strings[self.names[index]]
+
+    def artist(self, index):
+        return self.strings[self.artists[index]]
+
+    def creator(self, index):
+        return self.strings[self.creators[index]]
+
+    def workshop_id(self, index):
+        return self.strings[self.workshop_ids[index]]
+
+    def workshop_url(self, index):
+        return self.strings[self.workshop_urls[index]]
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class SongRow:
+    """
+    歌曲行：目录中的一首歌及其状态和控件
+    """
+    __slots__ = ('catalog', 'index', 'status', 'rks', 'is_star', 'widget', 'status_label', 'stars_button')
+
+    def __init__(self, catalog, index, is_star=False):
+        self.catalog = catalog
+        self.index = index
+        self.status = (0, 0)
+        self.rks = 0
+        self.is_star = is_star
+        self.widget = None
+        self.status_label = None
+        self.stars_button = None
+
+    @property
+    def id(self):
+        return self.catalog.ids[self.index]
+
+    @property
+    def name(self):
+        return self.catalog.name(self.index)
+
+    @property
+    def artists(self):
+        return self.catalog.artist(self.index)
+
+    @property
+    def difficulty(self):
+        return self.catalog.difficulty(self.index)
+
+    @property
+    def workshop_id(self):
+        return self.catalog.workshop_id(self.index)
+
+    @property
+    def workshop_url(self):
+        return self.catalog.workshop_url(self.index)
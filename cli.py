@@ -0,0 +1,103 @@
+"""
+命令行读取进度，不启动界面
+
+python cli.py [--format json|table] [--grind X精准度] [--levels levels_info.json] [--save custom_data.sav] [--workshop 创意工坊目录]
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+
+import FileHandler
+import engine
+from catalog import SongCatalog
+
+
+def load_catalog(path):
+    if path is None:
+        return FileHandler.load_song_data()
+    with open(path, 'r', encoding='utf-8') as f:
+        return SongCatalog.from_songs(song for song in json.load(f) if isinstance(song, dict))
+
+
+def load_save(path):
+    if path is None:
+        return FileHandler.load_custom_data()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return json.load(f)
+
+
+def resolve_md5(catalog, workshop_root):
+    """通过MD5缓存获取每个谱面的MD5"""
+    md5_cache = FileHandler.load_md5_cache()
+    workshop_ids = {catalog.workshop_id(index) for index in range(len(catalog))}
+    if workshop_root is None:
+        level_paths = {workshop_id: FileHandler.get_adofai_path(workshop_id) for workshop_id in workshop_ids}
+    else:
+        level_paths = {workshop_id: os.path.join(workshop_root, workshop_id, 'main.adofai')
+                       for workshop_id in workshop_ids}
+    md5_map = md5_cache.resolve(level_paths)
+    if md5_cache.dirty:
+        FileHandler.save_md5_cache(md5_cache)
+    return md5_map
+
+
+def print_table(result, limit):
+    songs = [song for song in result['songs'] if song['status'] != 'unplayed']
+    songs.sort(key=lambda song: song['rks'], reverse=True)
+    print(f'{"id":>6}  {"difficulty":>10}  {"status":<12} {"progress":>9} {"rks":>7}  name')
+    for song in songs[:limit]:
+        print(f'{song["id"]:>6}  {song["difficulty"]:>10}  {song["status"]:<12} '
+              f'{song["progress"] * 100:>8.2f}% {song["rks"]:>7.2f}  {song["name"]}')
+    print(f'RKS: {result["rks"]:.2f}')
+
+
+def print_grind(catalog, states, x_accuracy, limit):
+    """达到 x_accuracy 后对总RKS提升最大的歌曲"""
+    top = engine.TopRks((index, state[2]) for index, state in enumerate(states) if state is not None)
+    status = engine.PERFECT if x_accuracy >= 1 else engine.CLEARED
+    gains = ((top.gain(index, engine.song_rks(catalog.difficulty(index), status, x_accuracy)), index)
+             for index in top.values)
+    print(f'{"id":>6}  {"difficulty":>10}  {"gain":>7}  name')
+    for gain, index in heapq.nlargest(limit, gains):
+        if gain <= 0:
+            break
+        print(f'{catalog.song_id(index):>6}  {catalog.difficulty(index):>10}  {gain:>+7.3f}  {catalog.name(index)}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='读取冰与火之舞自定义谱面进度')
+    parser.add_argument('--format', choices=('json', 'table'), default='table')
+    parser.add_argument('--levels', help='levels_info.json 路径，默认使用 resource 中的文件')
+    parser.add_argument('--save', help='custom_data.sav 路径，默认从Steam目录读取')
+    parser.add_argument('--workshop', help='创意工坊谱面目录，默认从Steam目录读取')
+    parser.add_argument('--limit', type=int, default=50, help='表格最多显示的歌曲数')
+    parser.add_argument('--grind', type=float, metavar='X_ACCURACY',
+                        help='列出达到该X精准度后总RKS提升最大的歌曲（如 1 表示完美无瑕）')
+    args = parser.parse_args(argv)
+
+    try:
+        catalog = load_catalog(args.levels)
+        custom_data = load_save(args.save)
+        md5_map = resolve_md5(catalog, args.workshop)
+    except (FileNotFoundError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    states = engine.evaluate(catalog, md5_map, custom_data)
+    if args.grind is not None:
+        print_grind(catalog, states, args.grind, args.limit)
+        return 0
+
+    result = engine.summarize(catalog, states)
+    if args.format == 'json':
+        json.dump(result, sys.stdout, ensure_ascii=False, indent=4)
+        print()
+    else:
+        print_table(result, args.limit)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+模组下载：流式写入磁盘，断点续传，SHA-256校验，以及跳过未变化文件的流式解压
+"""
+import hashlib
+import logging
+import os
+import shutil
+import urllib.parse
+import zlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+# 每次读取/写入的块大小
+CHUNK_SIZE = 64 * 1024
+# (连接超时, 读取超时)（秒）
+TIMEOUT = (5, 30)
+# 传输中断后续传的次数
+RETRIES = 3
+# 同时下载的文件数
+MAX_WORKERS = 4
+# 游戏目录中存放下载中文件的目录，失败时保留以便续传
+STAGING_DIR = '.mod-download'
+# 提交日志中表示新建目录的标记
+_NEW_DIR = object()
+
+
+class DownloadError(Exception):
+    pass
+
+
+class Artifact:
+    """
+    需要下载的文件
+    target 为游戏目录中的相对路径，存在即视为已安装；zip 文件解压到游戏目录，target 为其中最后安装的文件
+    sha256 为None时不校验
+    """
+
+    def __init__(self, name, url, target, sha256=None, extract=False):
+        self.name = name
+        self.url = url
+        self.target = target
+        self.sha256 = sha256
+        self.extract = extract
+
+
+# 下载地址与游戏目录中的安装位置
+# sha256 为None时从 GitHub 发布信息中读取发布的摘要（published_sha256）；需要固定版本时在这里填写
+BEPINEX = Artifact(
+    'BepInEx',
+    'https://github.com/BepInEx/BepInEx/releases/download/v5.4.23.3/BepInEx_win_x64_5.4.23.3.zip',
+    os.path.join('BepInEx', 'core', 'BepInEx.dll'),
+    extract=True,
+)
+SONGS_MANAGE_MOD = Artifact(
+    'SongsManageMod',
+    'https://github.com/kanostars/adofai-reader/releases/download/%E9%85%8D%E5%A5%97%E6%A8%A1%E7%BB%841.0.1'
+    '/SongsManageMod.dll',
+    os.path.join('BepInEx', 'plugins', 'SongsManageMod.dll'),
+)
+
+
+def sha256_of(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def published_sha256(url, session=None, timeout=TIMEOUT, api_root='https://api.github.com'):
+    """
+    GitHub 发布的文件在发布信息中的 SHA-256 摘要（assets[].digest）
+    不是 GitHub 发布地址、没有摘要或查询失败时返回None
+    """
+    import requests
+
+    parts = urllib.parse.urlsplit(url)
+    segments = [urllib.parse.unquote(segment) for segment in parts.path.split('/')]
+    # /<owner>/<repo>/releases/download/<tag>/<name>
+    if parts.netloc != 'github.com' or len(segments) != 7 or segments[3:5] != ['releases', 'download']:
+        return None
+    owner, repo, tag, name = segments[1], segments[2], segments[5], segments[6]
+    api = f'{api_root}/repos/{owner}/{repo}/releases/tags/{urllib.parse.quote(tag)}'
+    session = session or requests.Session()
+    try:
+        with session.get(api, headers={'Accept': 'application/vnd.github+json'}, timeout=timeout) as response:
+            response.raise_for_status()
+            assets = response.json().get('assets', [])
+    except (requests.RequestException, ValueError) as e:
+        logging.info(f"release metadata unavailable for {url}: {e}")
+        return None
+    for asset in assets:
+        digest = asset.get('digest') or ''
+        if asset.get('name') == name and digest.startswith('sha256:'):
+            return digest[len('sha256:'):]
+    return None
+
+
+def download(url, path, sha256=None, on_progress=None, session=None, timeout=TIMEOUT, retries=RETRIES):
+    """
+    下载到 path，传输中的数据写在 path.part 中，存在时通过 HTTP Range 续传
+    on_progress(已下载字节, 总字节或None)；校验失败时删除 .part 并抛出 DownloadError
+    sha256 为None时无法校验，不使用之前留下的 .part，从头下载
+    """
+    import requests
+
+    if sha256 is not None and os.path.exists(path) and sha256_of(path) == sha256:
+        return path
+
+    session = session or requests.Session()
+    part = f'{path}.part'
+    if sha256 is None and os.path.exists(part):
+        os.remove(part)
+    for attempt in range(retries + 1):
+        try:
+            _fetch(session, url, part, on_progress, timeout)
+            break
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            # 保留 .part，下次从断点继续
+            if attempt == retries:
+                raise DownloadError(f'{url}: {e}') from e
+            logging.info(f"download interrupted, resuming {url}: {e}")
+
+    if sha256 is not None:
+        digest = sha256_of(part)
+        if digest != sha256:
+            os.remove(part)
+            raise DownloadError(f'{url}: sha256 mismatch {digest}')
+    os.replace(part, path)
+    return path
+
+
+def _fetch(session, url, part, on_progress, timeout):
+    """下载或续传到 part，数据不完整时抛出 ConnectionError"""
+    import requests
+
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {'Range': f'bytes={offset}-'} if offset else {}
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if offset and response.status_code == 416:
+            # .part 已经完整
+            return
+        response.raise_for_status()
+        if offset and response.status_code != 206:
+            # 服务器不支持续传，从头下载
+            offset = 0
+        length = response.headers.get('Content-Length')
+        total = offset + int(length) if length is not None else None
+
+        with open(part, 'ab' if offset else 'wb') as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+                offset += len(chunk)
+                if on_progress is not None:
+                    on_progress(offset, total)
+
+    if total is not None and offset < total:
+        raise requests.ConnectionError(f'incomplete transfer: {offset}/{total} bytes')
+
+
+def _crc32_of(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def extract(zip_path, dest, on_progress=None, existing=None):
+    """
+    逐个文件流式解压到 dest，existing（默认为 dest）中大小和CRC与压缩包中相同的文件跳过
+    on_progress(已处理文件数, 文件总数)；返回 (解压的文件数, 跳过的文件数)
+    """
+    root = os.path.realpath(dest)
+    existing_root = os.path.realpath(existing or dest)
+    extracted = skipped = 0
+    with zipfile.ZipFile(zip_path) as zf:
+        entries = [info for info in zf.infolist() if not info.is_dir()]
+        for count, info in enumerate(entries, 1):
+            target = os.path.realpath(os.path.join(root, info.filename))
+            if os.path.commonpath((root, target)) != root:
+                raise DownloadError(f'unsafe path in archive: {info.filename}')
+
+            current = os.path.join(existing_root, os.path.relpath(target, root))
+            if os.path.isfile(current) and os.path.getsize(current) == info.file_size \
+                    and _crc32_of(current) == info.CRC:
+                skipped += 1
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                temp_path = f'{target}.tmp'
+                with zf.open(info) as source, open(temp_path, 'wb') as f:
+                    shutil.copyfileobj(source, f, CHUNK_SIZE)
+                os.replace(temp_path, target)
+                extracted += 1
+            if on_progress is not None:
+                on_progress(count, len(entries))
+    return extracted, skipped
+
+
+def missing(game_dir, artifacts=(BEPINEX, SONGS_MANAGE_MOD)):
+    """游戏目录中还没有安装的文件"""
+    return [artifact for artifact in artifacts if not os.path.exists(os.path.join(game_dir, artifact.target))]
+
+
+def make_session(pool_size=MAX_WORKERS):
+    """所有下载共用的会话，连接保持并复用"""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def install(game_dir, artifacts=(BEPINEX, SONGS_MANAGE_MOD), on_progress=None, session=None,
+            max_workers=MAX_WORKERS):
+    """
+    先找出缺少的文件，通过同一个会话并发下载到临时目录，全部成功后再移动到游戏目录
+    下载或安装失败时游戏目录不变；zip 中的文件先全部解压，最后移动 target 对应的文件
+    on_progress(文件名, 已完成, 总量) 可能在多个线程中调用；返回安装的文件名列表
+    失败时抛出 DownloadError(文件名, 原因)
+    """
+    todo = missing(game_dir, artifacts)
+    if not todo:
+        return []
+
+    staging = os.path.join(game_dir, STAGING_DIR)
+    try:
+        os.makedirs(staging, exist_ok=True)
+    except OSError as e:
+        raise DownloadError(todo[0].name, e) from e
+    session = session or make_session(max_workers)
+
+    def fetch(artifact):
+        def progress(done, total):
+            if on_progress is not None:
+                on_progress(artifact.name, done, total)
+
+        path = os.path.join(staging, artifact.name)
+        try:
+            sha256 = artifact.sha256 or published_sha256(artifact.url, session)
+            if sha256 is None:
+                logging.warning(f"no published sha256 for {artifact.name}, downloading without verification")
+            download(artifact.url, path, sha256, progress, session)
+        except Exception as e:
+            raise DownloadError(artifact.name, e) from e
+        return path
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(todo)), thread_name_prefix='download') as executor:
+        futures = [executor.submit(fetch, artifact) for artifact in todo]
+        paths = [future.result() for future in futures]
+
+    # 解压到临时目录，与游戏目录中相同的文件跳过
+    trees = []
+    for artifact, path in zip(todo, paths):
+        tree = os.path.join(staging, f'{artifact.name}.files')
+        shutil.rmtree(tree, ignore_errors=True)
+        if artifact.extract:
+            try:
+                extract(path, tree, existing=game_dir)
+            except (OSError, zipfile.BadZipFile, DownloadError) as e:
+                raise DownloadError(artifact.name, e) from e
+        else:
+            try:
+                os.makedirs(os.path.dirname(os.path.join(tree, artifact.target)), exist_ok=True)
+                os.replace(path, os.path.join(tree, artifact.target))
+            except OSError as e:
+                raise DownloadError(artifact.name, e) from e
+        trees.append(tree)
+
+    _commit_trees(list(zip(todo, trees)), game_dir, os.path.join(staging, 'backup'))
+    shutil.rmtree(staging, ignore_errors=True)
+    return [artifact.name for artifact in todo]
+
+
+def _commit_trees(items, game_dir, backup):
+    """
+    把每个 (文件, tree) 中的文件逐个替换到游戏目录，target 最后移动，它存在即说明安装完整
+    被替换的文件先移到 backup；任何一步失败（如游戏运行中文件被占用）时撤销已移动的文件，
+    游戏目录恢复原状后抛出 DownloadError(文件名, 原因)
+    """
+    # [(游戏目录中的路径, 备份路径、None（新文件）或 _NEW_DIR（新建的目录）)]
+    journal = []
+    for artifact, tree in items:
+        files = []
+        for directory, _, names in os.walk(tree):
+            files.extend(os.path.relpath(os.path.join(directory, name), tree) for name in names)
+        files.sort(key=lambda name: os.path.normpath(name) == os.path.normpath(artifact.target))
+        try:
+            for name in files:
+                target = os.path.join(game_dir, name)
+                _makedirs(os.path.dirname(target), journal)
+                saved = None
+                if os.path.lexists(target):
+                    saved = os.path.join(backup, name)
+                    os.makedirs(os.path.dirname(saved), exist_ok=True)
+                    os.replace(target, saved)
+                journal.append((target, saved))
+                os.replace(os.path.join(tree, name), target)
+        except OSError as e:
+            _rollback(journal)
+            raise DownloadError(artifact.name, e) from e
+
+
+def _makedirs(directory, journal):
+    """创建目录，新建的各级目录按从外到内的顺序记入 journal"""
+    missing_dirs = []
+    while directory and not os.path.isdir(directory):
+        missing_dirs.append(directory)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    for path in reversed(missing_dirs):
+        os.mkdir(path)
+        journal.append((path, _NEW_DIR))
+
+
+def _rollback(journal):
+    """按相反顺序移除新文件、还原备份，并删除新建的空目录"""
+    for target, saved in reversed(journal):
+        try:
+            if saved is _NEW_DIR:
+                os.rmdir(target)
+                continue
+            if os.path.lexists(target):
+                os.remove(target)
+            if saved is not None:
+                os.replace(saved, target)
+        except OSError as e:
+            logging.error(f"rollback failed for {target}: {e}")
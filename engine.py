@@ -0,0 +1,257 @@
+"""
+进度计算：由歌曲目录、MD5映射和存档数据得到每首歌的状态和总RKS，不依赖界面
+"""
+import bisect
+import heapq
+
+import numpy as np
+
+# 歌曲状态
+UNPLAYED = 0  # 未玩过
+IN_PROGRESS = 1  # 进行中
+CLEARED = 2  # 完成
+PERFECT = 3  # 完美无暇
+
+STATUS_NAMES = ('unplayed', 'in_progress', 'cleared', 'perfect')
+
+# 总RKS取最高的前若干首
+RKS_TOP = 20
+
+
+def lookup(custom_data, md5):
+    """存档中谱面的 (完成度, X精准度)"""
+    return custom_data.get(f'CustomWorld_{md5}_Completion'), custom_data.get(f'CustomWorld_{md5}_XAccuracy')
+
+
+def classify(completion, x_accuracy):
+    """由完成度和X精准度得到 (状态, 进度)"""
+    if completion is None:
+        return UNPLAYED, 0
+    if completion < 1:
+        return IN_PROGRESS, completion
+    if x_accuracy >= 1:
+        return PERFECT, 0
+    return CLEARED, x_accuracy
+
+
+def song_rks(difficulty, status, progress):
+    """单首歌的RKS：完美无暇为难度，完成为 难度 * 精准度²"""
+    if status == PERFECT:
+        return difficulty
+    if status == CLEARED:
+        return difficulty * progress * progress
+    return 0
+
+
+def average_rks(rks_values):
+    """最高的 RKS_TOP 首歌的RKS之和除以 RKS_TOP，只选出前 RKS_TOP 个而不完整排序"""
+    return sum(heapq.nlargest(RKS_TOP, rks_values)) / RKS_TOP
+
+
+def classify_arrays(completion, x_accuracy):
+    """
+    向量化的 classify，completion 中的NaN表示未玩过
+    返回 (状态数组, 进度数组)
+    """
+    played = ~np.isnan(completion)
+    cleared = completion >= 1
+    perfect = cleared & (x_accuracy >= 1)
+
+    status = played.astype(np.int8)
+    status[cleared] = CLEARED
+    status[perfect] = PERFECT
+    progress = np.where(cleared, x_accuracy, np.where(played, completion, 0.0))
+    progress[perfect] = 0
+    return status, progress
+
+
+def rks_array(difficulty, status, progress):
+    """向量化的 song_rks"""
+    return np.where(status == PERFECT, difficulty,
+                    np.where(status == CLEARED, difficulty * progress * progress, 0.0))
+
+
+def top_average(rks):
+    """数组版 average_rks，用 np.partition 选出最高的 RKS_TOP 个"""
+    if len(rks) > RKS_TOP:
+        rks = np.partition(rks, len(rks) - RKS_TOP)[-RKS_TOP:]
+    return float(rks.sum()) / RKS_TOP
+
+
+class TopRks:
+    """
+    最高 RKS_TOP 首歌的RKS聚合
+    前 RKS_TOP 名按升序存放在小列表中，其余歌曲存放在延迟删除的最大堆中，
+    单首歌的RKS变化时 O(log n) 更新
+    """
+
+    def __init__(self, values=(), size=RKS_TOP):
+        """values: 可迭代的 (键, rks)"""
+        self.size = size
+        self.values = dict(values)
+        top = heapq.nlargest(size, ((rks, key) for key, rks in self.values.items()))
+        self.top = sorted(top)
+        self.in_top = {key for _, key in top}
+        # 堆中 (−rks, 键) 与 values 不一致或键已在前列时视为过期
+        self.rest = [(-rks, key) for key, rks in self.values.items() if key not in self.in_top]
+        heapq.heapify(self.rest)
+
+    def update(self, key, rks):
+        """更新一首歌的RKS"""
+        old = self.values.get(key)
+        if old == rks and key in self.values:
+            return
+        self.values[key] = rks
+        if key in self.in_top:
+            del self.top[bisect.bisect_left(self.top, (old, key))]
+            self.in_top.discard(key)
+        heapq.heappush(self.rest, (-rks, key))
+        self._balance()
+
+        # 过期条目过多时重建堆
+        if len(self.rest) > 2 * len(self.values) + 64:
+            self.rest = [(-rks, key) for key, rks in self.values.items() if key not in self.in_top]
+            heapq.heapify(self.rest)
+
+    def _balance(self):
+        while len(self.top) < self.size and self._peek_rest() is not None:
+            self._promote()
+        while self.top and self._peek_rest() is not None and -self.rest[0][0] > self.top[0][0]:
+            self._promote()
+            rks, key = self.top.pop(0)
+            self.in_top.discard(key)
+            heapq.heappush(self.rest, (-rks, key))
+
+    def _promote(self):
+        negative, key = heapq.heappop(self.rest)
+        bisect.insort(self.top, (-negative, key))
+        self.in_top.add(key)
+
+    def _peek_rest(self):
+        """堆中最大的有效条目，顺带丢弃堆顶的过期条目"""
+        rest = self.rest
+        while rest:
+            negative, key = rest[0]
+            if key not in self.in_top and self.values.get(key) == -negative:
+                return rest[0]
+            heapq.heappop(rest)
+        return None
+
+    def total(self):
+        return sum(rks for rks, _ in self.top)
+
+    def average(self):
+        return self.total() / self.size
+
+    def gain(self, key, rks):
+        """这首歌的RKS变为 rks 时平均RKS的变化量，O(1)（不计清理过期条目）"""
+        old = self.values.get(key, 0)
+        if key in self.in_top:
+            best = self._peek_rest()
+            delta = max(rks, -best[0] if best is not None else 0) - old
+        elif len(self.top) < self.size:
+            delta = rks
+        else:
+            delta = max(rks - self.top[0][0], 0)
+        return delta / self.size
+
+    def __len__(self):
+        return len(self.values)
+
+
+class SongStates:
+    """
+    歌曲状态数组
+    难度、状态、进度和RKS按歌曲下标存放在NumPy数组中，一次向量化计算全部歌曲
+    """
+
+    def __init__(self, difficulties):
+        self.difficulty = np.asarray(difficulties, dtype=np.float64)
+        self.status = np.zeros(len(self.difficulty), dtype=np.int8)
+        self.progress = np.zeros(len(self.difficulty))
+        self.rks = np.zeros(len(self.difficulty))
+
+    def update(self, completion, x_accuracy, resolved=None):
+        """
+        由存档中的完成度和X精准度数组重新计算状态，返回发生变化的下标数组
+        resolved 为False的歌曲（找不到MD5）保持原状态
+        """
+        status, progress = classify_arrays(completion, x_accuracy)
+        rks = rks_array(self.difficulty, status, progress)
+        if resolved is not None:
+            status = np.where(resolved, status, self.status)
+            progress = np.where(resolved, progress, self.progress)
+            rks = np.where(resolved, rks, self.rks)
+
+        changed = np.flatnonzero((status != self.status) | (progress != self.progress) | (rks != self.rks))
+        self.status, self.progress, self.rks = status, progress, rks
+        return changed
+
+    def set(self, slots, completion, x_accuracy):
+        """只更新 slots 中的歌曲（同一个谱面的完成度和X精准度），返回发生变化的下标数组"""
+        status, progress = classify(completion, x_accuracy)
+        changed = []
+        for slot in slots:
+            rks = song_rks(float(self.difficulty[slot]), status, progress)
+            if status != self.status[slot] or progress != self.progress[slot] or rks != self.rks[slot]:
+                self.status[slot], self.progress[slot], self.rks[slot] = status, progress, rks
+                changed.append(slot)
+        return np.array(changed, dtype=np.intp)
+
+    def average_rks(self):
+        return top_average(self.rks)
+
+    def __len__(self):
+        return len(self.difficulty)
+
+
+def gather(custom_data, md5_list):
+    """
+    按下标读取存档中的 (完成度数组, X精准度数组)
+    md5_list 中为None或存档中没有记录的位置完成度为NaN
+    """
+    completion = np.full(len(md5_list), np.nan)
+    x_accuracy = np.zeros(len(md5_list))
+    for index, md5 in enumerate(md5_list):
+        if md5 is None:
+            continue
+        value, accuracy = lookup(custom_data, md5)
+        if value is not None:
+            completion[index] = value
+            x_accuracy[index] = accuracy or 0
+    return completion, x_accuracy
+
+
+def evaluate(catalog, md5_map, custom_data):
+    """
+    计算目录中每首歌的 (状态, 进度, rks)
+    md5_map: {创意工坊ID: MD5}，找不到MD5的歌曲结果为None
+    """
+    md5_list = [md5_map.get(catalog.workshop_id(index)) for index in range(len(catalog))]
+    states = SongStates(np.frombuffer(catalog.difficulties, dtype=np.float64) if len(catalog) else [])
+    states.update(*gather(custom_data, md5_list))
+    return [None if md5 is None else state
+            for md5, state in zip(md5_list, zip(states.status.tolist(), states.progress.tolist(),
+                                                states.rks.tolist()))]
+
+
+def summarize(catalog, states):
+    """计算结果转换为可序列化的字典"""
+    songs = []
+    for index, state in enumerate(states):
+        status, progress, rks = state if state is not None else (UNPLAYED, 0, 0)
+        songs.append({
+            'id': catalog.song_id(index),
+            'name': catalog.name(index),
+            'artists': catalog.artist(index),
+            'difficulty': catalog.difficulty(index),
+            'workshop_id': catalog.workshop_id(index),
+            'resolved': state is not None,
+            'status': STATUS_NAMES[status],
+            'progress': progress,
+            'rks': rks,
+        })
+    return {
+        'rks': average_rks(state[2] for state in states if state is not None),
+        'songs': songs,
+    }
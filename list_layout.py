@@ -0,0 +1,37 @@
+"""
+歌曲列表布局：与界面无关的偏移计算，ScrollContentWidget 和基准测试共用
+"""
+import bisect
+
+
+def build_layout(song_rows, item_height, show_header=False, hide_difficulty=()):
+    """
+    计算可见歌曲行与难度标题的纵向偏移（不含滚动位置）
+    每行的偏移为之前所有行与难度标题高度之和；show_header 时折叠的难度只显示标题
+    返回 (行偏移, 歌曲行, 标题偏移, 标题难度, 总高度)
+    """
+    row_offsets = []
+    row_items = []
+    header_offsets = []
+    header_items = []
+
+    offset = 0
+    last_difficulty = 0
+    for song_row in song_rows:
+        difficulty = song_row.difficulty
+        if show_header and difficulty != last_difficulty:
+            last_difficulty = difficulty
+            header_offsets.append(offset)
+            header_items.append(difficulty)
+            offset += item_height
+        if show_header and difficulty in hide_difficulty:
+            continue
+        row_offsets.append(offset)
+        row_items.append(song_row)
+        offset += item_height
+    return row_offsets, row_items, header_offsets, header_items, offset
+
+
+def visible_range(offsets, top, bottom):
+    """偏移在 [top, bottom] 内的下标范围"""
+    return range(bisect.bisect_left(offsets, top), bisect.bisect_right(offsets, bottom))
@@ -0,0 +1,73 @@
+"""
+后台分阶段加载：歌曲目录 → MD5解析 / 存档读取（并行）→ 状态计算
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from registry import gather_states
+
+# 阶段名，按完成顺序排列
+CATALOG = 'catalog'
+MD5 = 'md5'
+SAVE = 'save'
+STATES = 'states'
+STAGES = (CATALOG, MD5, SAVE, STATES)
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class LoadPipeline:
+    """
+    在工作线程中依次执行各加载阶段，每个阶段完成后调用 on_stage(阶段, 结果)
+    load_catalog() -> 目录；resolve_md5(目录) -> {创意工坊ID: MD5}；load_save() -> (存档文件状态, 存档数据)
+    states 阶段的结果为 (存档文件状态, gather_states 的结果)，下标与目录一致
+    阶段出错时调用 on_stage('error', 异常) 并停止；on_stage 在工作线程中调用
+    """
+
+    def __init__(self, load_catalog, resolve_md5, load_save, on_stage):
+        self.load_catalog = load_catalog
+        self.resolve_md5 = resolve_md5
+        self.load_save = load_save
+        self.on_stage = on_stage
+        self.cancelled = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='loader')
+        self.future = None
+
+    def start(self):
+        self.future = self.executor.submit(self._run)
+        return self.future
+
+    def cancel(self):
+        """取消加载，正在执行的阶段完成后丢弃结果，不再调用 on_stage"""
+        self.cancelled.set()
+
+    def _run(self):
+        try:
+            catalog = self._stage(CATALOG, self.load_catalog)
+            # 存档读取与MD5解析互不依赖，同时进行
+            save_future = self.executor.submit(self.load_save)
+            md5_map = self._stage(MD5, self.resolve_md5, catalog)
+            stat, custom_data = self._stage(SAVE, save_future.result)
+            workshop_ids = [catalog.workshop_id(index) for index in range(len(catalog))]
+            self._stage(STATES, lambda: (stat, gather_states(workshop_ids, custom_data, md5_map)))
+        except LoadCancelled:
+            logging.info("loading cancelled")
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.on_stage('error', e)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    def _stage(self, name, func, *args):
+        if self.cancelled.is_set():
+            raise LoadCancelled
+        with tracing.span(f'loader.{name}'):
+            result = func(*args)
+        if self.cancelled.is_set():
+            raise LoadCancelled
+        self.on_stage(name, result)
+        return result
@@ -1,37 +1,72 @@
 import logging
-import os.path
 import sys
-import zipfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtWidgets import (
-    QSizePolicy, QSpacerItem
+    QSizePolicy, QSpacerItem, QProgressBar
 )
 
-import SocketHandler
-from MD5Handler import generate_md5
+import downloader
+import loader
+import mod_client
+import save_watcher
+import tracing
+from PersistHandler import persist
+from catalog import SongCatalog, SongRow
+from registry import SongRegistry, select_rows
 from widget import *
 
+# 每次事件循环中创建歌曲行的时间预算（秒），保证加载期间界面仍可操作
+LOAD_SLICE = 0.012
+# 加载期间刷新歌曲列表的最小间隔（秒）
+LIST_REFRESH_INTERVAL = 0.2
+# 有搜索词时最多显示的歌曲数，一两个字的查询不必筛选和布局全部结果
+SEARCH_LIMIT = 500
+
 
 class SongApp(QWidget):
-    def __init__(self):
+    # 模组请求完成：(回调, 结果future)，从事件循环线程发出，在界面线程中处理
+    mod_finished = pyqtSignal(object, object)
+    # 模组推送的进度事件 (MD5, 完成度, X精准度) 和订阅状态变化
+    progress_pushed = pyqtSignal(str, float, float)
+    subscription_changed = pyqtSignal(bool)
+    # 后台读取的存档：(存档文件状态, registry.gather 的结果)
+    save_loaded = pyqtSignal(object)
+    # 后台加载阶段完成：(阶段, 结果)
+    load_stage = pyqtSignal(str, object)
+    # 模组下载进度 (文件名, 已完成, 总量) 和结果（失败的文件名，成功为None）
+    download_progress = pyqtSignal(str, object, object)
+    download_finished = pyqtSignal(object)
+
+    def __init__(self, model_view=False, deferred=False):
         self.toast = None
         super().__init__()
 
+        # 使用模型/代理绘制歌曲列表，而不是每首歌一组控件
+        self.model_view = model_view
+        # 先显示窗口，再在后台分阶段加载，歌曲列表逐步显示
+        self.deferred = deferred
+        self.populated = False
+
         self.setWindowTitle("歌曲列表")
         self.setFixedWidth(800)
         self.setMinimumHeight(400)
         self.resize(600, 500)
 
-        # 加载歌曲数据
-        self.songs = FileHandler.load_song_data()
+        # 歌曲数据在 populate 中加载
+        self.songs = None
         self.ids = []
 
         # 初始化数据结构
         self.btn_status = FileHandler.load_status_data()
-        self.stars = FileHandler.load_stars()
+        self.stars = set(FileHandler.load_stars())
         self.group_boxes = {}
         self.song_widgets = []
+        self.registry = SongRegistry()
+        # 上次读取时存档文件的 (修改时间, 大小)
+        self.custom_data_stat = None
 
         self.sort_com = None
         self.search_entry = None
@@ -40,62 +75,215 @@ class SongApp(QWidget):
         self.count_label = None
         self.rks_label = None
         self.scroll_area = None
-
-        self.socket_handler = SocketHandler.SocketHandler()
+        self.load_progress = None
+        self.cancel_load_btn = None
+
+        # 后台加载的状态：加载管线、下一个要创建的歌曲行、状态计算结果
+        self.pipeline = None
+        self.next_row = 0
+        self.stages_done = set()
+        self.loaded_states = None
+        self.list_refreshed_at = 0
+        # 每次事件循环中创建歌曲行的时间片
+        self.row_timer = QTimer(self)
+        self.row_timer.setInterval(0)
+        self.row_timer.timeout.connect(self.create_rows_slice)
+        self.load_stage.connect(self.on_load_stage)
+
+        # 模组通信在后台事件循环中进行，第一次请求时才启动线程
+        self.mod_loop = mod_client.LoopThread()
+        self.mod_client = mod_client.AsyncModClient()
+        self.mod_finished.connect(lambda callback, future: callback(future))
+        # 存档在单独的工作线程中读取，按提交顺序执行
+        self.save_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='save-loader')
+        self.save_loaded.connect(self.on_save_loaded)
+        self.save_watcher = None
+        # 模组下载在单独的工作线程中执行
+        self.download_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='download')
+        self.download_future = None
+        # 上次显示的下载百分比，-1 表示还未显示
+        self.download_shown = -1
+        self.download_state = {}
+        self.download_progress.connect(self.on_download_progress)
+        self.download_finished.connect(self.on_download_finished)
+        # 订阅进度推送期间不再因存档变化而读取存档
+        self.live_progress = False
+        self.subscription = mod_client.ProgressSubscription(self.progress_pushed.emit, self.subscription_changed.emit)
+        self.progress_pushed.connect(self.apply_progress)
+        self.subscription_changed.connect(self.on_subscription_changed)
 
         self.init_ui()
+        if self.deferred:
+            QTimer.singleShot(0, self.start_loading)
+        else:
+            self.populate()
+
+    def populate(self):
+        """同步加载歌曲数据，生成歌曲列表并读取存档"""
+        self.songs = FileHandler.load_song_data()
         self.create_all_widgets()
 
         self.load_song_states()
+        self.refresh_song_states()
+        self.update_visibility()
+        self.on_populated()
+
+    def on_populated(self):
+        self.populated = True
+        self.start_save_watcher()
+        self.mod_loop.submit(self.subscription.run())
+
+    def start_loading(self):
+        """在后台分阶段加载目录、MD5、存档和状态，歌曲行在界面线程中按时间片逐步创建"""
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.cancel_load_btn.show()
+        self.pipeline = loader.LoadPipeline(
+            FileHandler.load_song_data,
+            lambda catalog: self.resolve_md5({catalog.workshop_id(index) for index in range(len(catalog))}),
+            lambda: (FileHandler.custom_data_stat(), FileHandler.load_custom_data()),
+            self.load_stage.emit
+        )
+        self.pipeline.start()
+
+    def on_load_stage(self, stage, result):
+        """界面线程中处理后台加载阶段的结果"""
+        if self.pipeline is None:
+            return
+        if stage == 'error':
+            # 与同步加载一致：出错时只显示歌曲列表，不加载状态
+            logging.error(f"后台加载失败: {result!r}")
+            if self.songs is None:
+                self.songs = SongCatalog()
+                self.row_timer.start()
+            self.stages_done.update(loader.STAGES)
+        elif stage == loader.CATALOG:
+            self.songs = result
+            self.row_timer.start()
+        elif stage == loader.STATES:
+            self.loaded_states = result
+        self.stages_done.add(stage)
+        self.update_load_progress()
+        self.finish_loading()
+
+    @tracing.traced()
+    def create_rows_slice(self):
+        """在一个时间片内创建尽量多的歌曲行，并定期刷新列表"""
+        deadline = time.perf_counter() + LOAD_SLICE
+        while self.next_row < len(self.songs) and time.perf_counter() < deadline:
+            self.add_song_row(self.next_row)
+            self.next_row += 1
+
+        if self.next_row >= len(self.songs):
+            self.row_timer.stop()
+            self.update_visibility()
+            self.finish_loading()
+        elif time.perf_counter() - self.list_refreshed_at > LIST_REFRESH_INTERVAL:
+            self.update_visibility()
+            self.list_refreshed_at = time.perf_counter()
+        self.update_load_progress()
+
+    def update_load_progress(self):
+        """歌曲行创建占一半进度，其余各阶段平分"""
+        rows = self.next_row / len(self.songs) if self.songs else 0
+        stages = len(self.stages_done & set(loader.STAGES)) / len(loader.STAGES)
+        self.load_progress.setValue(int(rows * 50 + stages * 50))
+
+    def finish_loading(self):
+        """歌曲行全部创建且状态计算完成后应用状态"""
+        if self.pipeline is None or self.songs is None or self.next_row < len(self.songs) \
+                or not self.stages_done.issuperset(loader.STAGES):
+            return
+        self.pipeline = None
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        if self.loaded_states is not None:
+            # 新建的状态标签都显示未玩过，只刷新有变化的歌曲
+            self.refresh_song_states(self.apply_song_states(self.loaded_states))
+            self.loaded_states = None
+            self.update_visibility()
+        self.on_populated()
+
+    def cancel_loading(self):
+        """取消后台加载，保留已经创建的歌曲行，为这些歌曲读取存档并开始监视存档和订阅进度"""
+        if self.pipeline is None:
+            return
+        self.pipeline.cancel()
+        self.pipeline = None
+        self.row_timer.stop()
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        if self.songs is None:
+            self.songs = SongCatalog()
+        # 加载管线的状态按整个目录计算，与已创建的歌曲行对不上，在后台只为这些歌曲重新读取
+        self.loaded_states = None
+        self.update_visibility()
+        self.reload_song_states()
+        self.on_populated()
+        self.show_toast('已取消加载')
+
+    @tracing.traced()
+    def resolve_md5(self, workshop_ids):
+        """通过MD5缓存获取谱面的MD5，可以在工作线程中调用"""
+        md5_cache = FileHandler.load_md5_cache()
+
+        # 校验缓存，未缓存或已更新的谱面并发重新计算，一次性写回缓存
+        level_paths = {workshop_id: FileHandler.get_adofai_path(workshop_id) for workshop_id in workshop_ids}
+        md5_map = md5_cache.resolve(level_paths)
+        md5_cache.prune(FileHandler.base_url)
+        if md5_cache.dirty:
+            FileHandler.save_md5_cache(md5_cache)
+        logging.info(f"MD5 cache: {md5_cache.stats()}")
+        return md5_map
+
+    @tracing.traced()
+    def read_song_states(self):
+        """
+        读取存档并解析MD5，返回 (存档文件状态, registry.gather 的结果)；存档未变化或读取失败时返回None
+        只读取数据，可以在工作线程中调用
+        """
+        stat = FileHandler.custom_data_stat()
+        if stat is not None and stat == self.custom_data_stat:
+            return None
 
-    def load_song_states(self):
-        """加载歌曲状态数据"""
         try:
             cd = FileHandler.load_custom_data()
-            md5_cache = FileHandler.load_md5_cache()
-            new_cache = {}
-
-            for song in self.songs:
-                song_id = song['id']
-                widget = None
-                for w in self.song_widgets:
-                    if w['id'] == song_id:
-                        widget = w
-                        break
-                if not widget:
-                    continue
-                workshop_id = song['workshopUrl'].split('&')[0].split('=')[-1]
-
-                if workshop_id in md5_cache:
-                    md5 = md5_cache[workshop_id]
-                else:
-                    author, artist, song_ = FileHandler.open_adofai(workshop_id)
-                    if author is None and artist is None and song_ is None:
-                        continue
-                    md5 = generate_md5(author, artist, song_)
-                    new_cache[workshop_id] = md5
-
-                completion = cd.get(f'CustomWorld_{md5}_Completion')
-                x_accuracy = cd.get(f'CustomWorld_{md5}_XAccuracy')
-                if completion is None:
-                    widget['status'] = (0, 0)  # 未玩过
-                    continue
-                if completion < 1:
-                    widget['status'] = (1, completion)  # 进行中
-                    continue
-                if x_accuracy >= 1:
-                    widget['status'] = (3, 0)  # 完美无暇
-                    widget['rks'] = widget['difficulty']
-                    continue
-                widget['status'] = (2, x_accuracy)  # 完成
-                widget['rks'] = widget['difficulty'] * widget['status'][1] * widget['status'][1]
-
-            if new_cache:
-                md5_cache.update(new_cache)
-                FileHandler.save_md5_cache(md5_cache)
+            md5_map = self.resolve_md5(self.registry.workshop_ids())
+            return stat, self.registry.gather(cd, md5_map)
 
         except (FileNotFoundError, ValueError) as e:
             logging.error("无法加载自定义数据文件", e)
+            return None
+
+    @tracing.traced()
+    def load_song_states(self):
+        """加载歌曲状态数据，返回状态发生变化的歌曲；存档文件未变化时直接返回"""
+        result = self.read_song_states()
+        if result is None:
+            return []
+        return self.apply_song_states(result)
+
+    def apply_song_states(self, result):
+        """应用 read_song_states 的结果，返回状态发生变化的歌曲"""
+        stat, gathered = result
+        changed = self.registry.apply_states(gathered)
+        self.custom_data_stat = stat
+        return changed
+
+    def start_save_watcher(self):
+        """监视存档文件，游戏写入后在后台重新读取"""
+        try:
+            path = FileHandler.get_custom_data_path()
+        except FileNotFoundError as e:
+            logging.error(e)
+            return
+        self.save_watcher = save_watcher.FileWatcher(path, self.on_save_changed)
+        self.save_watcher.start()
+
+    def on_save_changed(self, stat):
+        # 在监视线程中调用；订阅模组推送期间进度已是最新
+        if not self.live_progress:
+            self.reload_song_states()
 
     def init_ui(self):
         # 菜单选项
@@ -111,7 +299,7 @@ class SongApp(QWidget):
             menu_layout,
             text=['未玩过', '进行中', '已完成', '完美无瑕', '已收藏'],
             checked=self.btn_status['data'],
-            change_connect=self.update_visibility
+            change_connect=lambda *_: self.update_visibility()
         )
 
         self.sort_com = ComboBox()
@@ -121,11 +309,17 @@ class SongApp(QWidget):
             SortEnum.ARTISTS,
             SortEnum.RKS
         ])
-        self.sort_com.currentIndexChanged.connect(self.update_sorted_list)
+        # 追踪包装后的槽函数不能直接连接：PyQt 不会再丢弃信号多余的参数
+        self.sort_com.currentIndexChanged.connect(lambda *_: self.update_sorted_list())
         menu_layout.addWidget(self.sort_com)
 
         self.search_entry = SearchEntry()
-        self.search_entry.textChanged.connect(self.update_visibility)
+        # 输入停顿后再筛选
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.update_visibility)
+        self.search_entry.textChanged.connect(lambda: self.search_timer.start())
         menu_layout.addWidget(self.search_entry)
 
         self.count_label = QLabel("歌曲: 0")
@@ -139,149 +333,150 @@ class SongApp(QWidget):
         check_connect_btn.clicked.connect(self.check_connect)
         menu_layout.addWidget(check_connect_btn)
 
+        # 后台加载进度，加载完成后隐藏
+        self.load_progress = QProgressBar()
+        self.load_progress.setFixedWidth(80)
+        self.load_progress.hide()
+        menu_layout.addWidget(self.load_progress)
+        self.cancel_load_btn = QPushButton("取消")
+        self.cancel_load_btn.clicked.connect(self.cancel_loading)
+        self.cancel_load_btn.hide()
+        menu_layout.addWidget(self.cancel_load_btn)
+
         menu_layout.addSpacerItem(QSpacerItem(20, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum))
         self.rks_label = QLabel("RKS: 0")
         menu_layout.addWidget(self.rks_label)
 
-        self.scroll_widget = ScrollContentWidget(self)
+        self.scroll_widget = SongListView(self) if self.model_view else ScrollContentWidget(self)
         self.scroll_widget.move(0, 50)
         self.scroll_widget.resize(self.width(), self.height() - 50)
 
         self.toast = ToastWidget(self)
 
     def download_mod(self):
-        # 以后要改
-
-        # 下载zip并解压
-        if not os.path.exists(os.path.join(FileHandler.game_url, 'BepInEx')):
-            try:
-                response = requests.get(
-                    'https://github.com/BepInEx/BepInEx/releases/download/v5.4.23.3/BepInEx_win_x64_5.4.23.3.zip')
-                with open(os.path.join(FileHandler.game_url, 'temp.zip'), 'wb') as f:
-                    f.write(response.content)
-                with zipfile.ZipFile(os.path.join(FileHandler.game_url, 'temp.zip'), 'r') as zip_ref:
-                    zip_ref.extractall(FileHandler.game_url)
-            except Exception as e:
-                self.show_toast('下载BepInEx失败')
-                logging.error(e)
-                return
-
-        # 下载mod
-        if not os.path.exists(os.path.join(FileHandler.game_url, 'BepInEx', 'plugins', 'SongsManageMod.dll')):
-            if not os.path.exists(os.path.join(FileHandler.game_url, 'BepInEx', 'plugins')):
-                os.makedirs(os.path.join(FileHandler.game_url, 'BepInEx', 'plugins'))
-            try:
-                response = requests.get(
-                    'https://github.com/kanostars/adofai-reader/releases/download/%E9%85%8D%E5%A5%97%E6%A8%A1%E7%BB%841.0.1/SongsManageMod.dll')
-                with open(os.path.join(FileHandler.game_url, 'BepInEx', 'plugins', 'SongsManageMod.dll'), 'wb') as f:
-                    f.write(response.content)
-            except Exception as e:
-                self.show_toast('下载模组失败')
-                logging.error(e)
-                return
+        """在后台下载并安装BepInEx和模组，进度通过信号显示"""
+        if self.download_future is not None and not self.download_future.done():
+            self.show_toast('正在下载')
+            return
+        try:
+            game_dir = FileHandler.game_url
+        except FileNotFoundError as e:
+            logging.error(e)
+            self.show_toast('找不到游戏目录')
+            return
+        self.download_future = self.download_executor.submit(self._install_mod, game_dir)
+
+    def _install_mod(self, game_dir):
+        try:
+            downloader.install(game_dir, on_progress=self.download_progress.emit)
+        except downloader.DownloadError as e:
+            logging.error(e)
+            self.download_finished.emit(e.args[0])
+        except Exception as e:
+            # 其他错误也要通知界面线程，否则只留在 future 中
+            logging.exception(e)
+            self.download_finished.emit('')
+        else:
+            self.download_finished.emit(None)
+
+    def on_download_progress(self, name, done, total):
+        """多个文件同时下载时显示总进度，变化不到1%时不刷新提示"""
+        self.download_state[name] = (done, total)
+        totals = [total for _, total in self.download_state.values()]
+        percent = None
+        if all(totals):
+            percent = sum(done for done, _ in self.download_state.values()) * 100 // sum(totals)
+        if percent == self.download_shown:
+            return
+        self.download_shown = percent
+        self.show_toast(f'下载中 {percent}%' if percent is not None else '下载中')
+
+    def on_download_finished(self, failed):
+        self.download_shown = -1
+        self.download_state = {}
+        if failed == downloader.BEPINEX.name:
+            self.show_toast('下载BepInEx失败')
+        elif failed == downloader.SONGS_MANAGE_MOD.name:
+            self.show_toast('下载模组失败')
+        elif failed is not None:
+            self.show_toast('安装失败')
+        else:
+            self.show_toast('下载成功')
 
-        self.show_toast('下载成功')
+    def request_mod(self, coro, callback):
+        """在后台执行模组请求，callback(future) 在界面线程中调用"""
+        self.mod_loop.submit(coro, lambda future: self.mod_finished.emit(callback, future))
 
     def check_connect(self):
-        # 以后要改
-        if self.socket_handler.is_connected():
-            if self.socket_handler.is_new_version():
-                self.show_toast('连接成功')
-            else:
-                self.show_toast('版本不一致')
-        else:
+        # 只查询一次版本，能收到响应即说明已连接
+        self.request_mod(self.mod_client.get_version(), self.on_version)
+
+    def on_version(self, future):
+        if future.exception() is not None:
             self.show_toast('连接失败')
+        elif future.result() == self.mod_client.mod_version:
+            self.show_toast('连接成功')
+        else:
+            self.show_toast('版本不一致')
+
+    def play_level(self, path):
+        """通过模组打开谱面，成功后最小化窗口"""
+        self.request_mod(self.mod_client.play(path), self.on_played)
+
+    def on_played(self, future):
+        if future.exception() is not None:
+            self.show_toast('模组连接失败')
+        else:
+            self.showMinimized()
 
     def create_all_widgets(self):
-        for song in self.songs:
-            # 获取谱子一些数据
-            song_id = song['id']
-            music_name = song["music"]["name"]
-            music_artists = ", ".join(song["music"]["artists"])
-            workshop_url = song["workshopUrl"]
-            difficulty = song.get("difficulty", 0)
-            status = (0, 0)
-            rks = 0
-
-            # 创建界面元素
-            name_label = NameLabel(text=music_name)
-            creators_label = ArtistsLabel(text=music_artists)
-            is_star = song_id in self.stars
-            stars_button = StarsButton(song_id=song_id, is_star=is_star)
-            download_btn = DownloadButton(url=workshop_url)
-            status_label = StatusLabel()
+        for index in range(len(self.songs)):
+            self.add_song_row(index)
+        self.next_row = len(self.songs)
+        self.scroll_widget.update_info(self.song_widgets, SortEnum.DIFFICULTY)
+
+    def add_song_row(self, index):
+        """创建目录中第 index 首歌的歌曲行"""
+        song_row = SongRow(self.songs, index, is_star=self.songs.song_id(index) in self.stars)
+
+        # 创建界面元素
+        if not self.model_view:
+            song_row.stars_button = StarsButton(song_id=song_row.id, is_star=song_row.is_star)
+            song_row.status_label = StatusLabel()
 
             row_widget = RowWidget()
             row_widget.setFixedWidth(self.width())
-            row_widget.add_widget(name_label)
-            row_widget.add_widget(creators_label)
-            row_widget.add_widget(stars_button)
-
-            row_widget.add_widget(download_btn)
-            row_widget.add_widget(status_label)
-
-            # 存储控件引用
-            self.song_widgets.append({
-                'id': song_id,
-                'name': music_name,
-                'widget': row_widget,
-                'artists': music_artists,
-                'difficulty': difficulty,
-                'status': status,
-                'status_label': status_label,
-                'rks': rks,
-                'stars_button': stars_button,
-                'is_star': is_star
-            })
-        self.scroll_widget.update_info(self.song_widgets, SortEnum.DIFFICULTY)
+            row_widget.add_widget(NameLabel(text=song_row.name))
+            row_widget.add_widget(ArtistsLabel(text=song_row.artists))
+            row_widget.add_widget(song_row.stars_button)
 
-    def update_sorted_list(self):
-        """ 更新歌曲列表的排序 """
-        current_sort = self.sort_com.currentText()
-        sort_order = self.sort_com.sort_order
-
-        # 根据排序方式排序数据
-        if current_sort == SortEnum.NAME:
-            self.song_widgets = sorted(self.song_widgets, key=lambda x: x['name'], reverse=sort_order)
-        elif current_sort == SortEnum.ARTISTS:
-            self.song_widgets = sorted(self.song_widgets, key=lambda x: x['artists'], reverse=sort_order)
-        elif current_sort == SortEnum.RKS:
-            self.song_widgets = sorted(self.song_widgets, key=lambda x: x['rks'], reverse=sort_order)
-        else:
-            self.song_widgets = sorted(self.song_widgets, key=lambda x: x['difficulty'], reverse=sort_order)
+            row_widget.add_widget(DownloadButton(url=song_row.workshop_url))
+            row_widget.add_widget(song_row.status_label)
+            song_row.widget = row_widget
+
+        self.song_widgets.append(song_row)
+        self.registry.add(song_row)
 
+    @tracing.traced()
+    def update_sorted_list(self):
+        """ 排序方式或方向变化，从预先排好的顺序中取出，不需要重新排序 """
         self.update_visibility()
 
+    @tracing.traced()
     def update_visibility(self):
         """更新歌曲列表的可见性"""
-        visible_count = 0
-        search_text = self.search_entry.text()
+        query = self.search_entry.text()
         active_states = [state for state, checked in enumerate(self.filter_check_box_group.get_checked()) if checked]
         current_sort = self.sort_com.currentText()
 
         # 获取收藏筛选状态
         show_stars = self.filter_check_box_group.get_checked(4)
 
-        data = []
+        # 不再显示的行由列表在刷新视口时隐藏
+        data, more = select_rows(self.registry.sort_index, current_sort, self.sort_com.sort_order, active_states,
+                                 show_stars, self.registry.search_index, query, SEARCH_LIMIT if query else None)
 
-        # 处理歌曲行可见性及布局
-        for idx, widget_info in enumerate(self.song_widgets):
-            current_state = widget_info['status'][0]
-            widget_text = widget_info['name'] + '\t' + widget_info['artists']
-
-            is_visible = (
-                    current_state in active_states and
-                    search_text.lower() in widget_text.lower() and
-                    (not show_stars or widget_info['is_star'])
-            )
-
-            widget_info['widget'].setVisible(False)
-
-            if is_visible:
-                data.append(widget_info)
-                visible_count += 1
-
-        self.count_label.setText(f"歌曲: {visible_count}")
+        self.count_label.setText(f"歌曲: {len(data)}+" if more else f"歌曲: {len(data)}")
 
         self.scroll_widget.update_info(data, current_sort)
 
@@ -289,54 +484,47 @@ class SongApp(QWidget):
         self.btn_status = {'data': self.filter_check_box_group.get_checked()}
         FileHandler.save_status_data(self.btn_status)
 
-    def refresh_song_states(self):
-        """刷新歌曲状态"""
-        rks_list = []
-        for widget_info in self.song_widgets:
-            status, progress = widget_info['status']
-            text = '未玩过'
-            difficulty = widget_info['difficulty']
-            if status == 1:
-                text = f'progress: {progress * 100: .2f}%'
-                widget_info['status_label'].setStyleSheet(
-                    "color: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1, stop: 0 #66e, stop: 1 #007FFF);"
-                )
-            elif status == 2:
-                text = f'x_a: {progress * 100: .2f}%'
-                widget_info['status_label'].setStyleSheet(
-                    "color: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1, stop: 0 #66e, stop: 1 #FFD700);"
-                )
-                widget_info['status_label'].setToolTip(f'rks: {difficulty * progress * progress:.2f}')
-                rks_list.append(difficulty * progress * progress)
-            elif status == 3:
-                text = '完美无瑕'
-                widget_info['status_label'].setStyleSheet(
-                    "color: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1, stop: 0 #66e, stop: 1 #fd3e7f);"
-                )
-                widget_info['status_label'].setToolTip(f'rks: {difficulty:.2f}')
-                rks_list.append(difficulty)
-            widget_info['status_label'].setText(text)
-        average = 0
-        if rks_list:
-            sorted_rks_list = sorted(rks_list, reverse=True)
-            average = sum(sorted_rks_list[:20]) / 20
+    @tracing.traced()
+    def refresh_song_states(self, song_rows=None):
+        """刷新歌曲状态，song_rows 为需要更新的歌曲，默认全部"""
+        if song_rows is None:
+            song_rows = self.song_widgets
+        for widget_info in song_rows:
+            self.refresh_status_label(widget_info)
+        if self.model_view:
+            self.scroll_widget.refresh_rows()
+
+        average = self.registry.average_rks()
 
         self.rks_label.setText(f'RKS: {average:.2f}')
 
+    @staticmethod
+    def refresh_status_label(widget_info):
+        """刷新单首歌曲的状态标签"""
+        status_label = widget_info.status_label
+        if status_label is None:
+            return
+        text, color, tooltip = status_display(*widget_info.status, widget_info.rks)
+        if color:
+            status_label.setStyleSheet(
+                f"color: qlineargradient(x1: 0, y1: 0, x2: 1, y2: 1, stop: 0 #66e, stop: 1 {color});"
+            )
+        if tooltip:
+            status_label.setToolTip(tooltip)
+        status_label.setText(text)
+
     def refresh_song_stars(self, song_id, is_stars):
         """处理收藏状态变化"""
         if is_stars:
-            if song_id not in self.stars:
-                self.stars.append(song_id)
+            self.stars.add(song_id)
         else:
-            if song_id in self.stars:
-                self.stars.remove(song_id)
+            self.stars.discard(song_id)
 
-        for widget_info in self.song_widgets:
-            if widget_info['id'] == song_id:
-                widget_info['is_star'] = is_stars
-                widget_info['stars_button'].update_icon()
-                break
+        widget_info = self.registry.get(song_id)
+        if widget_info:
+            widget_info.is_star = is_stars
+            if widget_info.stars_button is not None:
+                widget_info.stars_button.update_icon()
 
         FileHandler.save_stars(self.stars)
         self.update_visibility()  # 确保UI刷新
@@ -345,26 +533,70 @@ class SongApp(QWidget):
         self.toast.set_text(text)
         self.toast.show()
 
-    def changeEvent(self, event):
-        """当窗口最小化或恢复时重新加载状态"""
-        if event.type() == 99:
-            self.load_song_states()
-            self.refresh_song_states()
+    def reload_song_states(self):
+        """在工作线程中重新读取存档，结果交给界面线程处理"""
+        self.save_loader.submit(self._read_song_states_in_background)
+
+    def _read_song_states_in_background(self):
+        result = self.read_song_states()
+        if result is not None:
+            self.save_loaded.emit(result)
+
+    def on_save_loaded(self, result):
+        """界面线程中应用后台读取的存档，只更新变化的歌曲"""
+        changed = self.apply_song_states(result)
+        if changed:
+            self.refresh_song_states(changed)
+            self.update_visibility()
 
+    def apply_progress(self, md5, completion, x_accuracy):
+        """应用模组推送的一个谱面的进度"""
+        changed = self.registry.apply_progress(md5, completion, x_accuracy)
+        if changed:
+            self.refresh_song_states(changed)
             self.update_visibility()
 
-        super().changeEvent(event)
+    def on_subscription_changed(self, subscribed):
+        self.live_progress = subscribed
+        # 订阅建立前和推送中断期间可能漏掉事件，此时读取一次存档（存档未变化时直接返回）
+        self.reload_song_states()
 
     def resizeEvent(self, a0):
         self.scroll_widget.resize(self.width(), self.height() - 50)
         super().resizeEvent(a0)
 
+    def closeEvent(self, a0):
+        """停止后台加载、存档监视和模组通信，写完未保存的数据"""
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+            self.pipeline = None
+        self.row_timer.stop()
+        self.search_timer.stop()
+        if self.save_watcher is not None:
+            self.save_watcher.stop()
+            self.save_watcher = None
+        if self.mod_loop.thread.is_alive():
+            # 按提交顺序执行：先停止订阅、断开连接，再停止事件循环
+            self.mod_loop.loop.call_soon_threadsafe(self.subscription.stop)
+            try:
+                self.mod_loop.submit(self.mod_client.close()).result(timeout=1)
+            except Exception as e:
+                logging.info(f"mod client close failed: {e!r}")
+            self.mod_loop.stop()
+        self.save_loader.shutdown(wait=False, cancel_futures=True)
+        # 正在进行的安装不中断，完成后进程才退出
+        self.download_executor.shutdown(wait=False, cancel_futures=True)
+        persist.flush()
+        super().closeEvent(a0)
+
 
 if __name__ == '__main__':
     import global_var
 
+    if '--trace' in sys.argv:
+        tracing.enable()
     app = QApplication(sys.argv)
-    window = SongApp()
+    window = SongApp(model_view='--model-view' in sys.argv, deferred=True)
     global_var.global_window = window
     window.show()
     sys.exit(app.exec())
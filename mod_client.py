@@ -0,0 +1,251 @@
+"""
+异步模组客户端：与 SocketHandler 相同的 CONNECT / VERSION / LOAD_LEVEL 协议
+同一连接上可以连续发送多条命令（流水线），响应按发送顺序与命令对应
+"""
+import asyncio
+import collections
+import logging
+import threading
+
+from SocketHandler import CONNECT_TIMEOUT, READ_TIMEOUT
+
+
+class AsyncModClient:
+    """
+    连接在第一次请求时建立，断开后下次请求时重连
+    所有方法都必须在同一个事件循环中调用
+    """
+
+    def __init__(self, host='127.0.0.1', port=12345, mod_version='1.0.1',
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.mod_version = mod_version
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.writer = None
+        # 已发送、等待响应的请求，按发送顺序排列
+        self.pending = collections.deque()
+        self._reader_task = None
+        self._connect_lock = None
+
+    async def connect(self):
+        await self.close()
+        reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                     self.connect_timeout)
+        self._reader_task = asyncio.create_task(self._read_responses(reader, self.writer))
+
+    async def close(self):
+        writer = self.writer
+        if writer is None:
+            return
+        self._disconnect(writer, ConnectionError('connection closed'))
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def request(self, command):
+        """
+        发送一条命令并等待它的响应
+        复用的连接已被模组关闭时重连后重发一次；超时或新连接失败时抛出 OSError
+        """
+        while True:
+            fresh = await self._ensure_connected()
+            try:
+                return await self._send(command)
+            except ConnectionError:
+                if fresh:
+                    raise
+
+    async def _ensure_connected(self):
+        """未连接时建立连接，返回是否为新连接"""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self.writer is not None and not self.writer.is_closing():
+                return False
+            await self.connect()
+            return True
+
+    async def _send(self, command):
+        loop = asyncio.get_running_loop()
+        writer = self.writer
+        future = loop.create_future()
+        self.pending.append((writer, future))
+        writer.write(f'{command}\r\n'.encode())
+        # 缓冲区未满时不需要等待，流水线发送时省去每条命令的一次调度
+        if writer.transport.get_write_buffer_size() > 64 * 1024:
+            try:
+                await writer.drain()
+            except ConnectionError:
+                future.cancel()
+                raise
+        timer = loop.call_later(self.read_timeout, self._timeout, writer, future, command)
+        try:
+            return await future
+        finally:
+            timer.cancel()
+
+    def _timeout(self, writer, future, command):
+        """
+        模组没有回复时无法知道之后的响应对应哪条命令：该请求抛出 TimeoutError，并断开连接，
+        该连接上其余等待中的请求抛出 ConnectionError 后在新连接上重发
+        """
+        if not future.done():
+            future.set_exception(TimeoutError(f'no reply to {command!r} in {self.read_timeout}s'))
+        self._disconnect(writer, ConnectionError('connection dropped after a timeout'))
+
+    async def _read_responses(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError('connection closed by mod')
+                if not self.pending:
+                    continue
+                _, future = self.pending.popleft()
+                if not future.done():
+                    future.set_result(line.decode().strip())
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self._disconnect(writer, e if isinstance(e, ConnectionError) else ConnectionError(e))
+
+    def _disconnect(self, writer, error):
+        """关闭连接，并让该连接上所有未收到响应的请求失败"""
+        writer.close()
+        if self.writer is writer:
+            self.writer = None
+        remaining = collections.deque()
+        for item in self.pending:
+            if item[0] is writer:
+                if not item[1].done():
+                    item[1].set_exception(error)
+            else:
+                remaining.append(item)
+        self.pending = remaining
+
+    async def play(self, path):
+        return await self.request(f'LOAD_LEVEL{path}')
+
+    async def get_version(self):
+        return await self.request('VERSION')
+
+    async def is_connected(self):
+        try:
+            await self.request('CONNECT')
+            return True
+        except OSError:
+            return False
+
+    async def is_new_version(self):
+        return await self.get_version() == self.mod_version
+
+
+def parse_event(line):
+    """
+    解析模组推送的一行进度事件 "PROGRESS <MD5> <完成度> <X精准度>"
+    返回 (MD5, 完成度, X精准度)，其他内容（如心跳）返回None
+    """
+    parts = line.split()
+    if len(parts) != 4 or parts[0] != 'PROGRESS':
+        return None
+    try:
+        return parts[1], float(parts[2]), float(parts[3])
+    except ValueError:
+        return None
+
+
+class ProgressSubscription:
+    """
+    订阅模组推送的进度事件
+    使用单独的连接发送 SUBSCRIBE，之后模组在每次游玩谱面后推送该谱面存档中的完成度和X精准度
+    on_event(MD5, 完成度, X精准度) 和 on_state(是否已订阅) 在事件循环线程中调用；断开后定时重连
+    """
+
+    def __init__(self, on_event, on_state, host='127.0.0.1', port=12345,
+                 connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, retry_interval=5.0):
+        self.on_event = on_event
+        self.on_state = on_state
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_interval = retry_interval
+        self.subscribed = False
+        self.writer = None
+        self.stopped = False
+
+    async def run(self):
+        while not self.stopped:
+            try:
+                await self._subscribe()
+            except (OSError, asyncio.IncompleteReadError) as e:
+                logging.info(f"progress subscription closed: {e!r}")
+            finally:
+                if self.writer is not None:
+                    self.writer.close()
+                    self.writer = None
+                if self.subscribed:
+                    self.subscribed = False
+                    self.on_state(False)
+            if not self.stopped:
+                await asyncio.sleep(self.retry_interval)
+
+    async def _subscribe(self):
+        reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                     self.connect_timeout)
+        self.writer.write(b'SUBSCRIBE\r\n')
+        await self.writer.drain()
+        reply = await asyncio.wait_for(reader.readline(), self.read_timeout)
+        if reply.strip() != b'SUBSCRIBED':
+            raise ConnectionError(f'subscription rejected: {reply!r}')
+
+        self.subscribed = True
+        self.on_state(True)
+        # 事件间隔不定，这里不设读取超时
+        while line := await reader.readline():
+            event = parse_event(line.decode())
+            if event is not None:
+                self.on_event(*event)
+        raise ConnectionError('connection closed by mod')
+
+    def stop(self):
+        """停止订阅，需要在事件循环线程中调用"""
+        self.stopped = True
+        if self.writer is not None:
+            self.writer.close()
+
+
+class LoopThread:
+    """
+    在后台线程中运行的事件循环
+    界面线程通过 submit 提交协程，不会因网络等待而阻塞
+    """
+
+    def __init__(self, name='mod-client'):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self):
+        if not self.thread.is_alive():
+            self.thread.start()
+
+    def submit(self, coro, callback=None):
+        """
+        在事件循环中执行协程，返回 concurrent.futures.Future
+        callback(future) 在事件循环线程中调用
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def stop(self):
+        if self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
@@ -0,0 +1,327 @@
+import bisect
+import heapq
+
+import numpy as np
+
+import engine
+from enums import SortEnum
+
+# 搜索结果的上限少于歌曲数的 1/SPARSE_RATIO 时按排序位置排列结果，否则按顺序遍历
+SPARSE_RATIO = 8
+
+
+def gather_states(workshop_ids, custom_data, md5_map):
+    """
+    按顺序取出每首歌状态计算所需的 (完成度数组, X精准度数组, 是否找到MD5, {MD5: [下标]})
+    不修改任何数据，可以在工作线程中调用
+    """
+    md5_list = [md5_map.get(workshop_id) for workshop_id in workshop_ids]
+    completion, x_accuracy = engine.gather(custom_data, md5_list)
+    resolved = np.fromiter((md5 is not None for md5 in md5_list), dtype=bool, count=len(md5_list))
+    slots_by_md5 = {}
+    for slot, md5 in enumerate(md5_list):
+        if md5 is not None:
+            slots_by_md5.setdefault(md5, []).append(slot)
+    return completion, x_accuracy, resolved, slots_by_md5
+
+
+def filter_rows(song_rows, active_states, matched_ids=None, show_stars=False):
+    """
+    按顺序筛选歌曲行：状态在 active_states 中、在搜索结果 matched_ids 中（None 为全部）、
+    show_stars 时只保留收藏的歌曲
+    """
+    return [song_row for song_row in song_rows
+            if song_row.status[0] in active_states
+            and (matched_ids is None or song_row.id in matched_ids)
+            and (not show_stars or song_row.is_star)]
+
+
+def select_rows(sort_index, sort_text, reverse, active_states, show_stars=False,
+                search_index=None, query='', limit=None):
+    """
+    按排序依次选出歌曲行：状态在 active_states 中、匹配搜索词 query、show_stars 时只保留收藏的歌曲
+    最多取 limit 行（None 为不限），返回 (歌曲行, 是否还有更多)
+    搜索结果可能较少时只按排序位置排列结果；其余情况按顺序遍历，取满 limit 行即停止
+    """
+    rows = sort_index.rows
+    order = None
+    keep = None
+    if search_index is not None and query:
+        if search_index.estimate(query) * SPARSE_RATIO < len(rows):
+            slots = search_index.search_slots(query)
+            order = sorted(slots, key=sort_index.rank(sort_text).__getitem__, reverse=reverse)
+        else:
+            # 可能匹配大多数歌曲（如一两个字的查询），直接在顺序中逐个匹配
+            query = query.lower()
+            texts = search_index.texts
+            keep = lambda slot: query in texts[slot]
+    if order is None:
+        order = sort_index.slots(sort_text, reverse)
+        if keep is not None:
+            order = filter(keep, order)
+
+    result = []
+    for slot in order:
+        song_row = rows[slot]
+        if song_row.status[0] in active_states and (not show_stars or song_row.is_star):
+            if limit is not None and len(result) >= limit:
+                return result, True
+            result.append(song_row)
+    return result, False
+
+
+class SongRegistry:
+    """
+    歌曲索引
+    按歌曲ID和创意工坊ID查找歌曲行数据，所有查找都为O(1)
+    """
+
+    def __init__(self):
+        self.by_id = {}
+        # 同一个创意工坊谱面可能对应多首歌曲
+        self.by_workshop_id = {}
+        # 按添加顺序排列的歌曲行，与 states 中的下标一一对应
+        self.rows = []
+        self.states = None
+        # 按歌曲ID增量维护的前 RKS_TOP 名
+        self.top_rks = engine.TopRks()
+        # {MD5: [下标]}，在 load_states 中生成，用于应用模组推送的进度
+        self.slots_by_md5 = {}
+        self.sort_index = SortIndex(self.rows)
+        # 歌曲行加入时同时建立搜索索引，加载期间也能搜索已加入的歌曲
+        self.search_index = SearchIndex()
+
+    def add(self, song_row):
+        self.by_id[song_row.id] = song_row
+        self.rows.append(song_row)
+        self.search_index.add(song_row)
+        self.by_workshop_id.setdefault(song_row.workshop_id, []).append(song_row)
+
+    def get(self, song_id):
+        return self.by_id.get(song_id)
+
+    def get_by_workshop_id(self, workshop_id):
+        return self.by_workshop_id.get(workshop_id, [])
+
+    def workshop_ids(self):
+        return self.by_workshop_id.keys()
+
+    def load_states(self, custom_data, md5_map):
+        """
+        根据存档数据更新每首歌的状态，返回状态或RKS发生变化的歌曲
+        custom_data: custom_data.sav 内容，md5_map: {创意工坊ID: MD5}
+        """
+        return self.apply_states(self.gather(custom_data, md5_map))
+
+    def gather(self, custom_data, md5_map):
+        """按歌曲行顺序调用 gather_states，只读取歌曲行，可以在工作线程中调用"""
+        return gather_states([song_row.workshop_id for song_row in self.rows], custom_data, md5_map)
+
+    def apply_states(self, gathered):
+        """应用 gather 的结果，返回状态或RKS发生变化的歌曲"""
+        completion, x_accuracy, resolved, self.slots_by_md5 = gathered
+        if self.states is None or len(self.states) != len(self.rows):
+            self.states = engine.SongStates([song_row.difficulty for song_row in self.rows])
+            self.top_rks = engine.TopRks((song_row.id, 0) for song_row in self.rows)
+        return self._write_back(self.states.update(completion, x_accuracy, resolved))
+
+    def apply_progress(self, md5, completion, x_accuracy):
+        """
+        应用一个谱面的最新完成度和X精准度，不读取存档，返回发生变化的歌曲
+        load_states 之前或MD5未知时忽略
+        """
+        slots = self.slots_by_md5.get(md5)
+        if not slots:
+            return []
+        return self._write_back(self.states.set(slots, completion, x_accuracy))
+
+    def _write_back(self, changed):
+        """只有变化的歌曲需要回写到歌曲行"""
+        states = self.states
+        statuses = states.status[changed].tolist()
+        progresses = states.progress[changed].tolist()
+        rks_values = states.rks[changed].tolist()
+        changed_rows = []
+        for slot, status, progress, rks in zip(changed.tolist(), statuses, progresses, rks_values):
+            song_row = self.rows[slot]
+            if song_row.rks != rks:
+                self.sort_index.reposition(slot, song_row.rks, rks)
+            song_row.status = (status, progress)
+            song_row.rks = rks
+            self.top_rks.update(song_row.id, rks)
+            changed_rows.append(song_row)
+        return changed_rows
+
+    def average_rks(self):
+        """最高的前 RKS_TOP 首歌的平均RKS"""
+        return self.top_rks.average()
+
+    def gain(self, song_id, x_accuracy):
+        """这首歌达到 x_accuracy 的X精准度时平均RKS的提升"""
+        song_row = self.by_id[song_id]
+        status = engine.PERFECT if x_accuracy >= 1 else engine.CLEARED
+        return self.top_rks.gain(song_id, engine.song_rks(song_row.difficulty, status, x_accuracy))
+
+    def best_gains(self, x_accuracy=1, limit=10):
+        """所有歌曲都达到 x_accuracy 时，对平均RKS提升最大的 limit 首歌，返回 [(提升, 歌曲行)]"""
+        gains = ((self.gain(song_row.id, x_accuracy), song_row) for song_row in self.rows)
+        return heapq.nlargest(limit, (item for item in gains if item[0] > 0), key=lambda item: item[0])
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+class SortIndex:
+    """
+    每种排序方式预先排好的歌曲行下标（升序），降序时倒序遍历，切换排序不需要比较
+    难度、名称、作者的顺序在第一次使用时生成，之后只合并新增的歌曲行；RKS 变化时只移动变化的歌曲
+    """
+
+    KEYS = {
+        SortEnum.DIFFICULTY: lambda song_row: song_row.difficulty,
+        SortEnum.NAME: lambda song_row: song_row.name,
+        SortEnum.ARTISTS: lambda song_row: song_row.artists,
+    }
+
+    def __init__(self, rows):
+        self.rows = rows
+        # {排序方式: [下标]}
+        self.orders = {}
+        # [(RKS, 下标)]，相同RKS按下标排列
+        self.rks_keys = []
+        # {排序方式: [位置]}，在 rank 中生成
+        self.ranks = {}
+
+    def ordered(self, sort_text, reverse=False):
+        """按排序方式依次返回歌曲行"""
+        rows = self.rows
+        return (rows[slot] for slot in self.slots(sort_text, reverse))
+
+    def slots(self, sort_text, reverse=False):
+        """按排序方式依次返回歌曲行下标"""
+        if sort_text == SortEnum.RKS:
+            keys = self._rks_keys()
+            return (slot for _, slot in (reversed(keys) if reverse else keys))
+        order = self._order(sort_text)
+        return reversed(order) if reverse else iter(order)
+
+    def rank(self, sort_text):
+        """每个下标在升序中的位置，用于按排序排列少量歌曲而不遍历整个顺序"""
+        rank = self.ranks.get(sort_text)
+        if rank is None or len(rank) != len(self.rows):
+            rank = [0] * len(self.rows)
+            for position, slot in enumerate(self.slots(sort_text)):
+                rank[slot] = position
+            self.ranks[sort_text] = rank
+        return rank
+
+    def _order(self, sort_text):
+        key = self.KEYS.get(sort_text, self.KEYS[SortEnum.DIFFICULTY])
+        rows = self.rows
+        order = self.orders.get(sort_text, [])
+        if len(order) != len(rows):
+            # 加载期间歌曲行只会追加：新增的行排序后与已有顺序合并
+            added = sorted(range(len(order), len(rows)), key=lambda slot: key(rows[slot]))
+            order = list(heapq.merge(order, added, key=lambda slot: key(rows[slot])))
+            self.orders[sort_text] = order
+        return order
+
+    def _rks_keys(self):
+        if len(self.rks_keys) != len(self.rows):
+            self.rks_keys = sorted((song_row.rks, slot) for slot, song_row in enumerate(self.rows))
+        return self.rks_keys
+
+    def reposition(self, slot, old_rks, rks):
+        """歌曲的RKS从 old_rks 变为 rks，在 RKS 顺序中移动这一首；顺序还未生成时忽略"""
+        self.ranks.pop(SortEnum.RKS, None)
+        keys = self.rks_keys
+        if len(keys) != len(self.rows):
+            return
+        index = bisect.bisect_left(keys, (old_rks, slot))
+        del keys[index]
+        bisect.insort(keys, (rks, slot))
+
+
+class SearchIndex:
+    """
+    歌曲搜索索引，下标与 SongRegistry.rows 一致
+    预先生成小写的 "名称\\t作者" 文本和三元组倒排索引（按下标排列的列表），歌曲行创建时逐个加入；
+    新查询包含上次查询时只在上次结果中筛选
+    """
+
+    def __init__(self, song_rows=()):
+        self.song_ids = []
+        self.texts = []
+        self.trigrams = {}
+        self.last_query = ''
+        self.last_result = None
+        for song_row in song_rows:
+            self.add(song_row)
+
+    def add(self, song_row):
+        index = len(self.texts)
+        text = (song_row.name + '\t' + song_row.artists).lower()
+        self.song_ids.append(song_row.id)
+        self.texts.append(text)
+        for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            posting = self.trigrams.get(trigram)
+            if posting is None:
+                self.trigrams[trigram] = [index]
+            else:
+                posting.append(index)
+        # 上次的结果不包含新加入的歌曲
+        self.last_query, self.last_result = '', None
+
+    def search(self, query):
+        """返回匹配的歌曲ID集合，空查询返回None（全部匹配）"""
+        result = self.search_slots(query)
+        if result is None:
+            return None
+        return {self.song_ids[index] for index in result}
+
+    def search_slots(self, query):
+        """返回匹配的下标列表，空查询返回None（全部匹配）"""
+        query = query.lower()
+        if not query:
+            self.last_query, self.last_result = '', None
+            return None
+
+        if self.last_result is not None and self.last_query in query:
+            candidates = self.last_result
+        elif len(query) >= 3:
+            candidates = self._trigram_candidates(query)
+        else:
+            candidates = range(len(self.texts))
+
+        texts = self.texts
+        result = [index for index in candidates if query in texts[index]]
+        self.last_query, self.last_result = query, result
+        return result
+
+    def estimate(self, query):
+        """匹配数的上限，不扫描文本：可复用的上次结果数、最短的三元组列表长度或全部歌曲数"""
+        query = query.lower()
+        if self.last_result is not None and self.last_query and self.last_query in query:
+            return len(self.last_result)
+        if len(query) >= 3:
+            return min(len(self.trigrams.get(query[i:i + 3], ())) for i in range(len(query) - 2))
+        return len(self.texts)
+
+    def _trigram_candidates(self, query):
+        """包含查询中所有三元组的歌曲"""
+        postings = []
+        for i in range(len(query) - 2):
+            posting = self.trigrams.get(query[i:i + 3])
+            if posting is None:
+                return []
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
@@ -0,0 +1,138 @@
+"""
+存档文件监视：Linux 上使用 inotify，其他平台定时比较文件的 (修改时间, 大小)
+"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+import time
+
+# inotify 事件：写入后关闭、移入（先写临时文件再替换）、创建、删除
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_inotify_event = struct.Struct('iIII')
+
+
+def file_stat(path):
+    """文件的 (修改时间, 大小)，文件不存在时返回None"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class Inotify:
+    """通过 ctypes 调用 inotify 监视一个目录，不可用时构造抛出 OSError"""
+
+    def __init__(self, directory):
+        name = ctypes.util.find_library('c')
+        if name is None or not hasattr(select, 'select'):
+            raise OSError('inotify is not available')
+        libc = ctypes.CDLL(name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, 'inotify_add_watch failed', directory)
+
+    def read(self, timeout):
+        """等待最多 timeout 秒，返回期间发生变化的文件名集合"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        names = set()
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = _inotify_event.unpack_from(data, offset)
+            offset += _inotify_event.size
+            names.add(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    在后台线程中监视一个文件
+    短时间内的连续写入合并为一次：最后一次变化后 debounce 秒内没有新的变化才调用 on_change(stat)，
+    on_change 在监视线程中调用，(修改时间, 大小) 与上次通知时相同则不调用
+    """
+
+    def __init__(self, path, on_change, debounce=0.3, poll_interval=1.0, use_inotify=True):
+        self.path = path
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.inotify = None
+        self.last_stat = file_stat(path)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='save-watcher', daemon=True)
+
+    @property
+    def mode(self):
+        return 'inotify' if self.inotify is not None else 'poll'
+
+    def start(self):
+        if self.use_inotify:
+            try:
+                self.inotify = Inotify(os.path.dirname(os.path.abspath(self.path)))
+            except OSError as e:
+                logging.info(f"inotify unavailable, polling {self.path}: {e}")
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    def _run(self):
+        name = os.path.basename(self.path)
+        seen = self.last_stat
+        deadline = None
+        try:
+            while not self.stopped.is_set():
+                timeout = self.poll_interval if deadline is None else max(deadline - time.monotonic(), 0)
+                if self.inotify is not None:
+                    if name in self.inotify.read(timeout):
+                        deadline = time.monotonic() + self.debounce
+                else:
+                    self.stopped.wait(timeout)
+                    stat = file_stat(self.path)
+                    if stat != seen:
+                        seen = stat
+                        deadline = time.monotonic() + self.debounce
+
+                if deadline is not None and time.monotonic() >= deadline:
+                    deadline = None
+                    stat = file_stat(self.path)
+                    if stat != self.last_stat:
+                        self.last_stat = stat
+                        try:
+                            self.on_change(stat)
+                        except Exception:
+                            logging.exception("save watcher callback failed")
+        finally:
+            if self.inotify is not None:
+                self.inotify.close()
@@ -0,0 +1,145 @@
+"""
+性能追踪：记录耗时区间和计数，程序退出时写出 Chrome 追踪格式的JSON文件（chrome://tracing 或 Perfetto 打开）
+默认关闭，设置环境变量 ADOFAI_TRACE=文件路径 或启动参数 --trace 开启；关闭时每次调用只多一次判断
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = 'ADOFAI_TRACE'
+DEFAULT_PATH = 'trace.json'
+
+_tracer = None
+_null_span = contextlib.nullcontext()
+
+
+class Tracer:
+    """收集事件，时间戳为开启追踪后的微秒数"""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self.events = []
+        # {计数名: 累计值}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def now(self):
+        return (time.perf_counter_ns() - self.origin) / 1000
+
+    def add_span(self, name, start, end, args=None):
+        event = {'name': name, 'ph': 'X', 'ts': start, 'dur': end - start,
+                 'pid': self.pid, 'tid': threading.get_ident()}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def add_counter(self, name, value):
+        self.events.append({'name': name, 'ph': 'C', 'ts': self.now(), 'pid': self.pid, 'args': {name: value}})
+
+    def count(self, name, value):
+        with self.lock:
+            total = self.counters.get(name, 0) + value
+            self.counters[name] = total
+        self.add_counter(name, total)
+
+    def dump(self):
+        """写出追踪文件，附带线程名和各计数的累计值"""
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in threads.items()]
+        with self.lock:
+            counters = dict(self.counters)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms',
+                       'otherData': {'counters': counters}}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.add_span(self.name, self.start, self.tracer.now(), self.args)
+
+
+def enable(path=None):
+    """开启追踪，退出时写出到 path（默认 ADOFAI_TRACE 或 trace.json）"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path or os.environ.get(TRACE_ENV) or DEFAULT_PATH)
+        atexit.register(dump)
+    return _tracer
+
+
+def enabled():
+    return _tracer is not None
+
+
+def dump():
+    if _tracer is not None:
+        _tracer.dump()
+
+
+def span(name, **args):
+    """记录 with 块的耗时"""
+    tracer = _tracer
+    if tracer is None:
+        return _null_span
+    return _Span(tracer, name, args)
+
+
+def traced(name=None):
+    """
+    记录函数每次调用的耗时，区间名默认为函数的限定名
+    包装后的函数接受任意参数，连接到Qt信号时需要通过 lambda 丢弃多余的参数
+    """
+
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            start = tracer.now()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.add_span(label, start, tracer.now())
+
+        return wrapper
+
+    return decorate
+
+
+def count(name, value=1):
+    """累加计数（读取的文件数、缓存命中数等）"""
+    if _tracer is not None and value:
+        _tracer.count(name, value)
+
+
+def sample(name, value):
+    """记录当前值（每帧布局的行数等）"""
+    if _tracer is not None:
+        _tracer.add_counter(name, value)
+
+
+if os.environ.get(TRACE_ENV):
+    enable()
@@ -1,13 +1,53 @@
+import bisect
 import os.path
 
-from PyQt6.QtCore import Qt, QUrl, QRect, QPropertyAnimation, QEasingCurve, QTimer
-from PyQt6.QtGui import QFontMetrics, QDesktopServices, QPainter
+from PyQt6.QtCore import Qt, QUrl, QRect, QPropertyAnimation, QEasingCurve, QTimer, QAbstractListModel, \
+    QModelIndex, QSize, QEvent, QPoint
+from PyQt6.QtGui import QFontMetrics, QDesktopServices, QPainter, QLinearGradient, QColor, QPen, QBrush, QFont
 from PyQt6.QtWidgets import QComboBox, QLabel, QPushButton, QCheckBox, QStyle, QLineEdit, QWidget, QHBoxLayout, \
-    QGraphicsOpacityEffect, QScrollBar, QApplication
+    QGraphicsOpacityEffect, QScrollBar, QApplication, QListView, QStyledItemDelegate, QStyleOptionButton, \
+    QAbstractItemView, QToolTip
 
 from enums import *
 import FileHandler
+import engine
 import global_var
+import list_layout
+import tracing
+
+# 歌曲行各列的 (名称, 宽度)，与 RowWidget 中控件的宽度一致
+ROW_COLUMNS = (('name', 220), ('artists', 190), ('star', 20), ('download', 70), ('status', 100))
+ROW_SPACING = 10
+
+
+def status_display(status, progress, rks):
+    """状态标签的 (文字, 渐变终止色, 提示)"""
+    if status == engine.IN_PROGRESS:
+        return f'progress: {progress * 100: .2f}%', '#007FFF', None
+    if status == engine.CLEARED:
+        return f'x_a: {progress * 100: .2f}%', '#FFD700', f'rks: {rks:.2f}'
+    if status == engine.PERFECT:
+        return '完美无瑕', '#fd3e7f', f'rks: {rks:.2f}'
+    return '未玩过', None, None
+
+
+def copy_text(text):
+    """复制文字到剪贴板并提示"""
+    QApplication.clipboard().setText(text)
+    if global_var.global_window:
+        global_var.global_window.show_toast('已复制')
+
+
+def open_workshop_level(url):
+    """已订阅的谱面通过模组打开，否则打开创意工坊网页"""
+    if url and url.startswith(("http://", "https://")):
+        workshop_id = url.split('&')[0].split('=')[-1]
+        if os.path.exists(FileHandler.get_adofai_path(workshop_id)):
+            # 直接发送打开命令，失败即说明未连接，不再单独检查连接；结果异步返回
+            global_var.global_window.play_level(FileHandler.get_adofai_path(workshop_id))
+        else:
+            global_var.global_window.show_toast('已打开网页，请手动订阅')
+            QDesktopServices.openUrl(QUrl(url))
 
 
 class FilterCheckBox(QCheckBox):
@@ -214,9 +254,7 @@ class NameLabel(QLabel):
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.RightButton:
-            QApplication.clipboard().setText(self.text)
-            if global_var.global_window:
-                global_var.global_window.show_toast('已复制')
+            copy_text(self.text)
 
 
 class ArtistsLabel(QLabel):
@@ -248,17 +286,7 @@ class DownloadButton(QPushButton):
         self.url = url.strip()
 
     def mouseReleaseEvent(self, event):
-        if self.url and self.url.startswith(("http://", "https://")):
-            workshop_id = self.url.split('&')[0].split('=')[-1]
-            if os.path.exists(FileHandler.get_adofai_path(workshop_id)):
-                if global_var.global_window and global_var.global_window.socket_handler.is_connected():
-                    global_var.global_window.socket_handler.play(FileHandler.get_adofai_path(workshop_id))
-                    global_var.global_window.showMinimized()
-                else:
-                    global_var.global_window.show_toast('模组连接失败')
-            else:
-                global_var.global_window.show_toast('已打开网页，请手动订阅')
-                QDesktopServices.openUrl(QUrl(self.url))
+        open_workshop_level(self.url)
 
 
 class RowWidget(QWidget):
@@ -302,9 +330,10 @@ class DifficultyLabel(QLabel):
         if event.button() == Qt.MouseButton.LeftButton:
             self.is_hide = not self.is_hide
             if self.is_hide:
-                self.parent.hide_difficulty.append(self.difficulty)
+                self.parent.hide_difficulty.add(self.difficulty)
             else:
-                self.parent.hide_difficulty.remove(self.difficulty)
+                self.parent.hide_difficulty.discard(self.difficulty)
+            self.parent.update_layout()
             self.parent.refresh_window()
             self.parent._update_scrollbar()
 
@@ -318,7 +347,7 @@ class ScrollContentWidget(QWidget):
         super().__init__(parent)
 
         self.data = []
-        self.hide_difficulty = []
+        self.hide_difficulty = set()
         self.pos = 0
         self.final_pos = 0
         self.difficulty_label_dict = {}
@@ -329,6 +358,14 @@ class ScrollContentWidget(QWidget):
         self.total_label_delta = 0
         self.show_item = self.height() // self.item_height + 1
 
+        # 布局索引：可见歌曲行与难度标题的纵向偏移（不含滚动位置），数据/排序/折叠变化时重建
+        self.row_offsets = []
+        self.row_items = []
+        self.header_offsets = []
+        self.header_items = []
+        self.shown_widgets = set()
+        self.shown_headers = set()
+
         self.difficulty_label = QLabel(self)
         self.difficulty_label.move(30, 0)
         self.difficulty_label.setFixedWidth(self.width() - 30)
@@ -357,13 +394,27 @@ class ScrollContentWidget(QWidget):
 
     def update_info(self, data, sort_text):
         self.data = data
-        self.update_pos()
         self.sort_text = sort_text
+        self.update_layout()
+        self.update_pos()
+        self.refresh_window()
 
+    @tracing.traced()
+    def update_layout(self):
+        """
+        重建布局索引，每行的偏移为之前所有行与难度标题高度之和
+        不隐藏已显示的行：之后的 refresh_window 只切换进出视口的行
+        """
+        (self.row_offsets, self.row_items, self.header_offsets, self.header_items,
+         offset) = list_layout.build_layout(self.data, self.item_height, self.sort_text == SortEnum.DIFFICULTY,
+                                            self.hide_difficulty)
+        self.total_label_delta = offset - len(self.data) * self.item_height
+
+    @tracing.traced()
     def refresh_window(self):
+        """只处理视口内的行：二分查找第一行，遍历到视口底部为止"""
         pos = self.pos
-        for difficulty_label in self.difficulty_label_dict.values():
-            difficulty_label.hide()
+        height = self.height()
 
         if self.sort_text == SortEnum.DIFFICULTY:
             self.difficulty_label.show()
@@ -372,63 +423,66 @@ class ScrollContentWidget(QWidget):
             self.difficulty_label.hide()
             self.delta = 0
 
-        label_delta = 0
-        first_finish = False
-        last_difficulty = 0
-        for index, song_row in enumerate(self.data):
-            widget = song_row.get('widget')
-
-            difficulty = song_row.get('difficulty')
-            if difficulty != last_difficulty:
-                last_difficulty = difficulty
-
-                if self.sort_text == SortEnum.DIFFICULTY:
-                    if pos + self.item_height * index + label_delta > 0:
-                        difficulty_label = self.difficulty_label_dict.get(difficulty)
-                        if not difficulty_label:
-                            difficulty_label = DifficultyLabel(self, difficulty)
-                            difficulty_label.setFixedWidth(self.width() - 35 - 12)
-                            difficulty_label.setText(
-                                f'-------------------------------------------------------------------难度{difficulty}------------------------------------------------------------------')
-                            self.difficulty_label_dict[difficulty] = difficulty_label
-                        difficulty_label.move(35, int(pos + self.item_height * index + label_delta))
-                        difficulty_label.show()
-
-                    label_delta += self.item_height
-
-            widget.setParent(self)
-
-            if difficulty in self.hide_difficulty and self.sort_text == SortEnum.DIFFICULTY:
-                label_delta -= self.item_height
-                widget.hide()
+        # 难度标题
+        headers = set()
+        start = bisect.bisect_right(self.header_offsets, -pos)
+        for index in range(start, len(self.header_offsets)):
+            header_y = int(pos + self.header_offsets[index])
+            if header_y > height:
+                break
+            difficulty = self.header_items[index]
+            difficulty_label = self.difficulty_label_dict.get(difficulty)
+            if not difficulty_label:
+                difficulty_label = DifficultyLabel(self, difficulty)
+                difficulty_label.setFixedWidth(self.width() - 35 - 12)
+                difficulty_label.setText(
+                    f'-------------------------------------------------------------------难度{difficulty}------------------------------------------------------------------')
+                self.difficulty_label_dict[difficulty] = difficulty_label
+            difficulty_label.move(35, header_y)
+            difficulty_label.show()
+            headers.add(difficulty_label)
+        for difficulty_label in self.shown_headers - headers:
+            difficulty_label.hide()
+        self.shown_headers = headers
+
+        # 歌曲行
+        widgets = set()
+        start = bisect.bisect_left(self.row_offsets, self.delta - self.item_height - pos - 1)
+        for index in range(start, len(self.row_offsets)):
+            widget_y = int(pos + self.row_offsets[index])
+            if widget_y > height:
+                break
+            if widget_y + self.item_height - self.delta < 0:
+                continue
+            song_row = self.row_items[index]
+            widget = song_row.widget
+            # 第一次进入视口时才设置父控件，未显示过的行不加入控件树
+            if widget.parentWidget() is not self:
+                widget.setParent(self)
+            if not widgets:
+                self.difficulty_label.setText(f'难度：{song_row.difficulty}')
+            if widget_y < self.delta:
+                delta = int(self.delta - widget_y)
+                widget.move(delta, widget_y)
+                widget.setFixedWidth(self.width() - delta * 2 - 12)
+                opacity = 1 / delta
+                widget.set_opacity(opacity)
+            elif widget_y + self.item_height > height:
+                delta = int(widget_y + self.item_height - height)
+                widget.move(delta, widget_y)
+                widget.setFixedWidth(self.width() - delta * 2 - 12)
+                opacity = 1 / delta
+                widget.set_opacity(opacity)
             else:
-                widget_y = int(pos + self.item_height * index + label_delta)
-
-                if widget_y > self.height() or widget_y + self.item_height - self.delta < 0:
-                    widget.hide()
-                else:
-                    if not first_finish:
-                        first_finish = True
-                        self.difficulty_label.setText(f'难度：{song_row.get("difficulty")}')
-                    if widget_y < self.delta:
-                        delta = int(self.delta - widget_y)
-                        widget.move(delta, widget_y)
-                        widget.setFixedWidth(self.width() - delta * 2 - 12)
-                        opacity = 1 / delta
-                        widget.set_opacity(opacity)
-                    elif widget_y + self.item_height > self.height():
-                        delta = int(widget_y + self.item_height - self.height())
-                        widget.move(delta, widget_y)
-                        widget.setFixedWidth(self.width() - delta * 2 - 12)
-                        opacity = 1 / delta
-                        widget.set_opacity(opacity)
-                    else:
-                        widget.move(0, widget_y)
-                        widget.setFixedWidth(self.width() - 12)
-                        widget.set_opacity(1)
-                    widget.show()
-
-        self.total_label_delta = label_delta
+                widget.move(0, widget_y)
+                widget.setFixedWidth(self.width() - 12)
+                widget.set_opacity(1)
+            widget.show()
+            widgets.add(widget)
+        for widget in self.shown_widgets - widgets:
+            widget.hide()
+        self.shown_widgets = widgets
+        tracing.sample('rows_per_frame', len(widgets))
 
     def update_pos(self):
         if len(self.data) * self.item_height < self.height() or self.final_pos > self.delta:
@@ -550,3 +604,239 @@ class StarsButton(QPushButton):
         if event.button() == Qt.MouseButton.LeftButton:
             self.toggle_star()
         super().mouseReleaseEvent(event)
+
+
+class DifficultyHeader:
+    """
+    模型中的难度标题项
+    """
+    __slots__ = ('difficulty',)
+
+    def __init__(self, difficulty):
+        self.difficulty = difficulty
+
+
+class SongListModel(QAbstractListModel):
+    """
+    歌曲列表模型
+    难度标题和歌曲行展开为一维列表
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []
+
+    def set_entries(self, entries):
+        self.beginResetModel()
+        self.entries = entries
+        self.endResetModel()
+
+    def entry(self, index):
+        return self.entries[index.row()]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        entry = self.entries[index.row()]
+        if isinstance(entry, DifficultyHeader):
+            return f'难度{entry.difficulty}'
+        return entry.name
+
+
+class SongItemDelegate(QStyledItemDelegate):
+    """
+    歌曲行绘制，只绘制可见的行
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.star_font = QFont()
+        self.star_font.setPixelSize(16)
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.parent().item_height)
+
+    def paint(self, painter, option, index):
+        view = self.parent()
+        entry = index.model().entry(index)
+        rect = option.rect
+
+        painter.save()
+        painter.setOpacity(view.row_opacity(rect))
+        if isinstance(entry, DifficultyHeader):
+            painter.drawText(rect.adjusted(35, 0, -35, 0), Qt.AlignmentFlag.AlignCenter,
+                             f'{"-" * 67}难度{entry.difficulty}{"-" * 66}')
+        else:
+            fm = option.fontMetrics
+            columns = view.column_rects(rect)
+            align = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+
+            painter.drawText(columns['name'].adjusted(0, 0, -5, 0), align,
+                             fm.elidedText(entry.name, Qt.TextElideMode.ElideRight, 220))
+            painter.drawText(columns['artists'].adjusted(0, 0, -5, 0), align,
+                             fm.elidedText(entry.artists, Qt.TextElideMode.ElideRight, 150))
+
+            painter.setFont(self.star_font)
+            painter.setPen(QColor('gold') if entry.is_star else QColor('gray'))
+            painter.drawText(columns['star'], Qt.AlignmentFlag.AlignCenter, '★' if entry.is_star else '☆')
+            painter.setFont(option.font)
+
+            button = QStyleOptionButton()
+            button.rect = columns['download']
+            button.text = '下载'
+            button.state = QStyle.StateFlag.State_Enabled
+            view.style().drawControl(QStyle.ControlElement.CE_PushButton, button, painter, view)
+
+            text, color, _ = status_display(*entry.status, entry.rks)
+            status_rect = columns['status']
+            if color:
+                gradient = QLinearGradient(status_rect.topLeft().toPointF(), status_rect.bottomRight().toPointF())
+                gradient.setColorAt(0, QColor('#66e'))
+                gradient.setColorAt(1, QColor(color))
+                painter.setPen(QPen(QBrush(gradient), 1))
+            else:
+                painter.setPen(option.palette.text().color())
+            painter.drawText(status_rect, Qt.AlignmentFlag.AlignCenter, text)
+        painter.restore()
+
+
+class SongListView(QListView):
+    """
+    基于模型/代理的歌曲列表，与 ScrollContentWidget 接口一致
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.data = []
+        self.hide_difficulty = set()
+        self.sort_text = SortEnum.DIFFICULTY
+        self.item_height = 30
+        self.header_height = 30
+
+        self.song_model = SongListModel(self)
+        self.setModel(self.song_model)
+        self.setItemDelegate(SongItemDelegate(self))
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(self.item_height)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setMouseTracking(True)
+        self.setFrameShape(QListView.Shape.NoFrame)
+        self.setStyleSheet('QListView { background: transparent; }')
+
+        # 顶部固定显示当前难度
+        self.difficulty_label = QLabel(self)
+        self.difficulty_label.move(30, 0)
+        self.verticalScrollBar().valueChanged.connect(self._update_difficulty_label)
+
+    def update_info(self, data, sort_text):
+        self.data = data
+        self.sort_text = sort_text
+        self.refresh_window()
+
+    @tracing.traced()
+    def refresh_window(self):
+        """重新生成列表项（数据、排序或折叠变化时调用）"""
+        show_header = self.sort_text == SortEnum.DIFFICULTY
+        entries = []
+        last_difficulty = None
+        for song_row in self.data:
+            difficulty = song_row.difficulty
+            if show_header:
+                if difficulty != last_difficulty:
+                    last_difficulty = difficulty
+                    entries.append(DifficultyHeader(difficulty))
+                if difficulty in self.hide_difficulty:
+                    continue
+            entries.append(song_row)
+
+        self.setViewportMargins(0, self.header_height if show_header else 0, 0, 0)
+        self.difficulty_label.setVisible(show_header)
+        self.song_model.set_entries(entries)
+        self._update_difficulty_label()
+
+    def refresh_rows(self):
+        """歌曲状态或收藏变化后重绘可见行"""
+        self.viewport().update()
+
+    def column_rects(self, rect):
+        """歌曲行各列的区域，多余宽度平均分配到列间距"""
+        total = sum(width for _, width in ROW_COLUMNS)
+        spacing = max(ROW_SPACING, (rect.width() - total) // (len(ROW_COLUMNS) - 1))
+        rects = {}
+        x = rect.left()
+        for name, width in ROW_COLUMNS:
+            rects[name] = QRect(x, rect.top(), width, rect.height())
+            x += width + spacing
+        return rects
+
+    def column_at(self, index, x):
+        for name, rect in self.column_rects(self.visualRect(index)).items():
+            if rect.left() <= x <= rect.right():
+                return name
+        return None
+
+    def row_opacity(self, rect):
+        """边缘渐隐：行超出视口的部分越多越透明"""
+        visible = min(rect.bottom() + 1, self.viewport().height()) - max(rect.top(), 0)
+        return max(0.0, min(1.0, visible / rect.height())) ** 2
+
+    def _update_difficulty_label(self):
+        index = self.indexAt(QPoint(0, 0))
+        if index.isValid():
+            self.difficulty_label.setText(f'难度：{self.song_model.entry(index).difficulty}')
+
+    def mousePressEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        if index.isValid() and event.button() == Qt.MouseButton.RightButton:
+            entry = self.song_model.entry(index)
+            if not isinstance(entry, DifficultyHeader) and self.column_at(index, event.position().x()) == 'name':
+                copy_text(entry.name)
+            return
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        index = self.indexAt(event.position().toPoint())
+        if not index.isValid() or event.button() != Qt.MouseButton.LeftButton:
+            return super().mouseReleaseEvent(event)
+
+        entry = self.song_model.entry(index)
+        if isinstance(entry, DifficultyHeader):
+            # 折叠/展开该难度
+            self.hide_difficulty ^= {entry.difficulty}
+            self.refresh_window()
+            return
+
+        column = self.column_at(index, event.position().x())
+        if column == 'star':
+            main_window = self.window()
+            if hasattr(main_window, 'refresh_song_stars'):
+                main_window.refresh_song_stars(entry.id, not entry.is_star)
+        elif column == 'download':
+            open_workshop_level(entry.workshop_url)
+        super().mouseReleaseEvent(event)
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.Type.ToolTip:
+            index = self.indexAt(event.pos())
+            text = None
+            if index.isValid() and not isinstance(self.song_model.entry(index), DifficultyHeader):
+                entry = self.song_model.entry(index)
+                column = self.column_at(index, event.pos().x())
+                if column == 'name':
+                    text = entry.name + '（右键以复制）'
+                elif column == 'artists':
+                    text = entry.artists
+                elif column == 'status':
+                    text = status_display(*entry.status, entry.rks)[2]
+            if text:
+                QToolTip.showText(event.globalPos(), text, self)
+            else:
+                QToolTip.hideText()
+            return True
+        return super().viewportEvent(event)